@@ -7,6 +7,8 @@ class Settings(BaseSettings):
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     debug: bool = False
+    # Run on uvloop when available; disable to use the pure-Python loop (e.g. for debuggers)
+    use_uvloop: bool = True
     
     # AI Service Configuration
     openai_api_key: Optional[str] = None
@@ -16,8 +18,17 @@ class Settings(BaseSettings):
     ai_service_timeout: int = 45
     mcp_client_timeout: int = 40
     
+    # Rate Limit Configuration (0 disables the limit)
+    openai_requests_per_minute: int = 0
+    openai_tokens_per_minute: int = 0
+    anthropic_requests_per_minute: int = 0
+    anthropic_tokens_per_minute: int = 0
+    
     # MCP Configuration
     mcp_config_path: str = "mcp_config.json"
+    # Most Grafana MCP tool calls in flight at once; more finish a batch sooner
+    # but put more load on Grafana and hold more responses in memory together
+    mcp_max_concurrency: int = 3
     
     class Config:
         # Look for .env in multiple locations
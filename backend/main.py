@@ -14,7 +14,8 @@ from datetime import datetime, timezone
 
 from config import settings
 from models import Message, Conversation
-from services.ai_service import AIService, AIProvider, AIServiceError, AIProviderError
+from services.ai_service import AIService, AIProvider, AIServiceError, AIProviderError, close_http_client
+from services.simple_mcp_client import simple_mcp_client
 from services.error_service import (
     error_service, log_error, create_error_context,
     ErrorCategory, ErrorSeverity, handle_api_errors
@@ -72,6 +73,10 @@ async def lifespan(app: FastAPI):
         else:
             logger.warning("No AI API keys configured - AI service will not be available")
         
+        # Open provider connections before the first chat request
+        if ai_service:
+            await ai_service.prewarm()
+        
         # MCP connections temporarily disabled
         # if ai_service:
         #     try:
@@ -91,6 +96,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down MCP Chatbot API server")
+    await close_http_client()
+    await simple_mcp_client.close()
 
 app = FastAPI(
     title="MCP Chatbot API",
@@ -283,5 +290,7 @@ if __name__ == "__main__":
         app, 
         host=settings.api_host, 
         port=settings.api_port,
+        # "auto" picks uvloop when it is installed (it comes with uvicorn[standard])
+        loop="auto" if settings.use_uvloop else "asyncio",
         log_level="info" if not settings.debug else "debug"
     )
\ No newline at end of file
@@ -1,10 +1,14 @@
+from collections import deque
 from datetime import datetime, timezone
-from typing import List, Optional
-from pydantic import BaseModel, Field, field_validator
+from typing import Deque, List, Optional
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 import uuid
 
 from .message import Message
 
+# Number of most recent messages kept in Conversation.recent_messages
+RECENT_MESSAGES_LIMIT = 10
+
 
 class Conversation(BaseModel):
     """Conversation model representing a chat conversation with multiple messages"""
@@ -13,10 +17,26 @@ class Conversation(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="Conversation creation timestamp")
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="Last update timestamp")
     
+    # Bounded window of the latest messages and the message count it reflects
+    _recent_messages: Deque[Message] = PrivateAttr(default_factory=lambda: deque(maxlen=RECENT_MESSAGES_LIMIT))
+    _recent_count: int = PrivateAttr(default=-1)
+    
+    @property
+    def recent_messages(self) -> Deque[Message]:
+        """The last RECENT_MESSAGES_LIMIT messages in insertion order"""
+        # Rebuild the window if messages were changed without add_message
+        if self._recent_count != len(self.messages):
+            self._recent_messages = deque(self.messages[-RECENT_MESSAGES_LIMIT:], maxlen=RECENT_MESSAGES_LIMIT)
+            self._recent_count = len(self.messages)
+        return self._recent_messages
+    
     def add_message(self, message: Message) -> None:
         """Add a message to the conversation"""
         if message.conversation_id != self.id:
             message.conversation_id = self.id
+        if self._recent_count == len(self.messages):
+            self._recent_messages.append(message)
+            self._recent_count += 1
         self.messages.append(message)
         self.updated_at = datetime.now(timezone.utc)
     
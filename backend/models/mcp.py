@@ -13,6 +13,8 @@ class MCPServerConfig(BaseModel):
     enabled: bool = Field(default=True, description="Whether the server is enabled")
     timeout: int = Field(default=30, description="Request timeout in seconds")
     max_retries: int = Field(default=3, description="Maximum number of retry attempts")
+    cacheable_tools: List[str] = Field(default_factory=list, description="Tools whose results may be cached for identical arguments")
+    ws_compression: bool = Field(default=False, description="Negotiate per-message deflate on WebSocket connections")
     
     @field_validator('name')
     @classmethod
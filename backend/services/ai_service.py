@@ -5,42 +5,183 @@ Supports OpenAI and Anthropic providers with configurable settings and MCP tool
 
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional, Union
+import re
+import sys
+import time
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple, Union
 from enum import Enum
-from dataclasses import dataclass
+from itertools import islice
+from dataclasses import dataclass, field, replace
+import httpx
 import openai
 import anthropic
 from config import settings
-from models.conversation import Conversation
+from models.conversation import Conversation, RECENT_MESSAGES_LIMIT
 from models.message import Message
 from services.simple_mcp_client import simple_mcp_client
 
 logger = logging.getLogger(__name__)
 
+# Number of most recent conversation messages sent to the AI provider, i.e. the
+# window Conversation.recent_messages keeps
+MAX_CONTEXT_MESSAGES = RECENT_MESSAGES_LIMIT
+
+# Number of conversations whose formatted history is kept by build_context
+HISTORY_CACHE_SIZE = 256
+
+# System prompt shared by every request; per-call context is appended to it
+SYSTEM_PROMPT = "You are a helpful AI assistant."
+
+# Prompts shorter than this (e.g. "ok", "hi") never trigger MCP tool discovery
+MIN_TOOL_PROMPT_LENGTH = 4
+
+# Greetings, acknowledgements and thanks that never need MCP tools. The pattern
+# is anchored and has no nested quantifiers, so matching stays linear.
+_SMALL_TALK_RE = re.compile(
+    r"^\W*(?:hi|hello|hey|thanks|thank you|thx|ok|okay|yes|yep|no|nope|sure|cool|great|bye|goodbye)"
+    r"(?:\s+(?:there|you|so much|a lot|again))?\W*$",
+    re.IGNORECASE
+)
+
+# Shared HTTP connection pool for all provider clients. Reusing one pool keeps
+# TCP/TLS connections to the provider APIs alive between requests and across
+# AIService instances instead of handshaking on every cold call.
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client used by the AI provider SDKs, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=settings.ai_service_timeout
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release pooled connections"""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+class _RateLimiter:
+    """
+    Token bucket for a provider's requests-per-minute and tokens-per-minute limits.
+    Callers wait here before sending instead of bouncing off provider 429s.
+    A limit of 0 disables that bucket.
+    """
+    
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._available_requests = float(requests_per_minute)
+        self._available_tokens = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed_minutes = (now - self._last_refill) / 60
+        self._last_refill = now
+        self._available_requests = min(
+            self.requests_per_minute,
+            self._available_requests + elapsed_minutes * self.requests_per_minute
+        )
+        self._available_tokens = min(
+            self.tokens_per_minute,
+            self._available_tokens + elapsed_minutes * self.tokens_per_minute
+        )
+    
+    async def acquire(self, tokens: int) -> None:
+        """Wait until there is capacity for one request consuming the given number of tokens"""
+        # A request larger than the whole bucket goes through once the bucket is full
+        tokens = min(tokens, self.tokens_per_minute)
+        
+        # Waiters hold the lock while sleeping so requests are released in arrival order
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.requests_per_minute and self._available_requests < 1:
+                    wait = (1 - self._available_requests) / self.requests_per_minute * 60
+                if self.tokens_per_minute and self._available_tokens < tokens:
+                    wait = max(wait, (tokens - self._available_tokens) / self.tokens_per_minute * 60)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            
+            if self.requests_per_minute:
+                self._available_requests -= 1
+            if self.tokens_per_minute:
+                self._available_tokens -= tokens
+
 class AIProvider(Enum):
     OPENAI = "openai"
     ANTHROPIC = "anthropic"
 
-@dataclass
+# Default model for each provider
+DEFAULT_MODELS = {
+    AIProvider.OPENAI: "gpt-4o-mini",
+    AIProvider.ANTHROPIC: "claude-3-5-sonnet-20241022"
+}
+
+# Rate limiters are shared by every AIService talking to the same provider
+_rate_limiters: Dict[AIProvider, Optional[_RateLimiter]] = {}
+
+def _get_rate_limiter(provider: AIProvider) -> Optional[_RateLimiter]:
+    """Get the rate limiter for a provider, or None when no limits are configured"""
+    if provider not in _rate_limiters:
+        requests_per_minute = getattr(settings, f"{provider.value}_requests_per_minute")
+        tokens_per_minute = getattr(settings, f"{provider.value}_tokens_per_minute")
+        if requests_per_minute or tokens_per_minute:
+            _rate_limiters[provider] = _RateLimiter(requests_per_minute, tokens_per_minute)
+        else:
+            _rate_limiters[provider] = None
+    return _rate_limiters[provider]
+
+def _estimate_text_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in a piece of text"""
+    # About four characters per token for English text
+    return len(text) // 4
+
+def _estimate_tokens(context: Dict[str, Any], max_tokens: int) -> int:
+    """Roughly estimate the tokens a request counts against the provider's limit"""
+    # The prompt estimate is kept up to date by build_context, plus the completion budget
+    return context["tokens"] + max_tokens
+
+def _build_system_prompt(additional_context: Optional[str]) -> str:
+    """Build the system prompt, returning the shared base prompt when there is no additional context"""
+    if not additional_context:
+        return SYSTEM_PROMPT
+    return f"{SYSTEM_PROMPT}\n\nAdditional context: {additional_context}"
+
+# Slotted dataclasses need Python 3.10+; older interpreters get a regular one
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_OPTIONS)
 class AIResponse:
     content: str
     provider: str
     model: str
     tokens_used: Optional[int] = None
     finish_reason: Optional[str] = None
-    mcp_tools_used: List[str] = None
-    
-    def __post_init__(self):
-        if self.mcp_tools_used is None:
-            self.mcp_tools_used = []
+    mcp_tools_used: List[str] = field(default_factory=list)
+
+@dataclass(**_DATACLASS_OPTIONS)
+class AIResponseDelta:
+    """A piece of a streamed AI response; the last one has a finish_reason and no content"""
+    content: str
+    finish_reason: Optional[str] = None
+    mcp_tools_used: List[str] = field(default_factory=list)
 
 class AIServiceError(Exception):
     """Base exception for AI service errors"""
-    pass
+    __slots__ = ()
 
 class AIProviderError(AIServiceError):
     """Exception for AI provider-specific errors"""
-    pass
+    __slots__ = ()
 
 class AIService:
     """
@@ -57,7 +198,7 @@ class AIService:
         
         # Set default models
         if model is None:
-            self.model = "gpt-4o-mini" if provider == AIProvider.OPENAI else "claude-3-5-sonnet-20241022"
+            self.model = DEFAULT_MODELS[provider]
         else:
             self.model = model
             
@@ -68,6 +209,10 @@ class AIService:
         # Initialize MCP client manager
         self.mcp_manager = None
         
+        # Formatted history per conversation:
+        # id -> (message count, last message id, messages, estimated tokens in messages)
+        self._history_cache: Dict[str, Tuple[int, str, List[Dict[str, str]], int]] = {}
+        
         self._initialize_clients()
         self._initialize_mcp()
     
@@ -75,19 +220,25 @@ class AIService:
         """Initialize AI provider clients based on available API keys"""
         if settings.openai_api_key:
             try:
-                # Initialize OpenAI client with the latest version
-                self._openai_client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
+                # Initialize OpenAI client on the shared connection pool
+                self._openai_client = openai.AsyncOpenAI(
+                    api_key=settings.openai_api_key,
+                    http_client=get_http_client()
+                )
                 logger.info("OpenAI client initialized successfully")
             except Exception as e:
-                logger.error(f"Failed to initialize OpenAI client: {e}")
+                logger.error("Failed to initialize OpenAI client: %s", e)
                 self._openai_client = None
         
         if settings.anthropic_api_key:
             try:
-                self._anthropic_client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+                self._anthropic_client = anthropic.AsyncAnthropic(
+                    api_key=settings.anthropic_api_key,
+                    http_client=get_http_client()
+                )
                 logger.info("Anthropic client initialized")
             except Exception as e:
-                logger.error(f"Failed to initialize Anthropic client: {e}")
+                logger.error("Failed to initialize Anthropic client: %s", e)
                 self._anthropic_client = None
         
         # Validate that the selected provider has a valid client
@@ -96,13 +247,43 @@ class AIService:
         elif self.provider == AIProvider.ANTHROPIC and not self._anthropic_client:
             raise AIServiceError("Anthropic API key not configured")
     
+    async def prewarm(self, timeout: float = 5.0) -> None:
+        """
+        Open connections to the configured AI providers ahead of the first request.
+        
+        Issues a lightweight HEAD request per provider on the shared connection pool
+        so the first chat completion does not pay DNS, TCP and TLS setup. Failures are
+        logged and otherwise ignored.
+        
+        Args:
+            timeout: Timeout in seconds for each warmup request
+        """
+        clients = {
+            name: client for name, client in (("openai", self._openai_client), ("anthropic", self._anthropic_client))
+            if client
+        }
+        if not clients:
+            return
+        
+        http_client = get_http_client()
+        results = await asyncio.gather(
+            *(http_client.head(str(client.base_url), timeout=timeout) for client in clients.values()),
+            return_exceptions=True
+        )
+        
+        for name, result in zip(clients, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to prewarm %s connection: %s", name, result)
+            else:
+                logger.info("Prewarmed %s connection", name)
+    
     def _initialize_mcp(self):
         """Initialize MCP client manager"""
         logger.info("MCP integration enabled with simple client")
         self.mcp_manager = simple_mcp_client
     
     def build_context(self, conversation: Optional[Conversation] = None, 
-                     additional_context: Optional[str] = None) -> List[Dict[str, str]]:
+                     additional_context: Optional[str] = None) -> Dict[str, Any]:
         """
         Build conversation context for AI model.
         
@@ -111,24 +292,78 @@ class AIService:
             additional_context: Additional context to include in the prompt
             
         Returns:
-            List of message dictionaries formatted for the AI provider
+            Dictionary with the system prompt under "system", the conversation
+            messages formatted for the AI provider under "messages" and the
+            estimated prompt tokens of both under "tokens"
         """
-        messages = []
-        
-        # Add system message with context
-        system_content = "You are a helpful AI assistant."
-        if additional_context:
-            system_content += f"\n\nAdditional context: {additional_context}"
-        
-        messages.append({"role": "system", "content": system_content})
+        system_content = _build_system_prompt(additional_context)
         
         # Add conversation history
+        messages, history_tokens = [], 0
         if conversation and conversation.messages:
-            for message in conversation.messages[-10:]:  # Limit to last 10 messages
-                role = "user" if message.sender == "user" else "assistant"
-                messages.append({"role": role, "content": message.content})
+            messages, history_tokens = self._get_history(conversation)
         
-        return messages
+        return {
+            "system": system_content,
+            "messages": messages,
+            "tokens": _estimate_text_tokens(system_content) + history_tokens
+        }
+    
+    def _get_history(self, conversation: Conversation) -> Tuple[List[Dict[str, str]], int]:
+        """
+        Get the recent conversation history formatted for the AI provider.
+        
+        Conversations are append-only, so the formatted window and its token
+        estimate are cached per conversation and only messages added since the
+        last call are converted and counted.
+        
+        Args:
+            conversation: Conversation object with message history
+            
+        Returns:
+            Tuple of (the last MAX_CONTEXT_MESSAGES messages as provider message
+            dictionaries, estimated tokens in those messages)
+        """
+        conversation_messages = conversation.messages
+        message_count = len(conversation_messages)
+        recent_messages = conversation.recent_messages
+        last_message_id = recent_messages[-1].id
+        
+        cached = self._history_cache.get(conversation.id)
+        if cached:
+            cached_count, cached_last_id, history, history_tokens = cached
+            if cached_count == message_count and cached_last_id == last_message_id:
+                return list(history), history_tokens
+            
+            # Extend the cached window if the conversation only grew since it was built
+            if cached_count < message_count and conversation_messages[cached_count - 1].id == cached_last_id:
+                new_count = min(message_count - cached_count, MAX_CONTEXT_MESSAGES)
+                new_messages = islice(recent_messages, len(recent_messages) - new_count, None)
+            else:
+                history, history_tokens, new_messages = [], 0, recent_messages
+        else:
+            history, history_tokens, new_messages = [], 0, recent_messages
+        
+        new_history = [
+            {"role": "user" if message.sender == "user" else "assistant", "content": message.content}
+            for message in new_messages
+        ]
+        
+        # Only the messages entering and leaving the window are counted
+        history = history + new_history
+        history_tokens += sum(_estimate_text_tokens(message["content"]) for message in new_history)
+        if len(history) > MAX_CONTEXT_MESSAGES:
+            dropped = history[:-MAX_CONTEXT_MESSAGES]
+            history_tokens -= sum(_estimate_text_tokens(message["content"]) for message in dropped)
+            history = history[-MAX_CONTEXT_MESSAGES:]
+        
+        # Keep the cache bounded by evicting the least recently built conversation
+        self._history_cache.pop(conversation.id, None)
+        if len(self._history_cache) >= HISTORY_CACHE_SIZE:
+            self._history_cache.pop(next(iter(self._history_cache)))
+        self._history_cache[conversation.id] = (message_count, last_message_id, history, history_tokens)
+        
+        return list(history), history_tokens
     
     async def initialize_mcp_connections(self):
         """Initialize MCP server connections"""
@@ -137,13 +372,13 @@ class AIService:
     
     async def get_relevant_tools(self, query: str) -> List[str]:
         """Get MCP tools relevant to the query"""
-        if not self.mcp_manager:
+        if not self._needs_tools(query):
             return []
         
         try:
             return await self.mcp_manager.get_relevant_tools(query)
         except Exception as e:
-            logger.error(f"Error getting relevant tools: {e}")
+            logger.error("Error getting relevant tools: %s", e)
             return []
     
     async def call_mcp_tools(self, tools_to_call: List[str]) -> List[Any]:
@@ -154,9 +389,51 @@ class AIService:
         try:
             return await self.mcp_manager.call_multiple_tools(tools_to_call)
         except Exception as e:
-            logger.error(f"Error calling MCP tools: {e}")
+            logger.error("Error calling MCP tools: %s", e)
             return []
     
+    def _needs_tools(self, prompt: str) -> bool:
+        """Cheap gate that skips MCP tool discovery for prompts that cannot need tools"""
+        return (
+            self.mcp_manager is not None
+            and len(prompt.strip()) >= MIN_TOOL_PROMPT_LENGTH
+            and not _SMALL_TALK_RE.match(prompt)
+        )
+    
+    async def _get_tool_context(self, prompt: str) -> Tuple[List[str], Optional[str]]:
+        """
+        Select and run the MCP tools relevant to the prompt.
+        
+        Args:
+            prompt: User's message/prompt
+            
+        Returns:
+            Tuple of (names of tools used, formatted tool results for the AI context)
+        """
+        try:
+            # Select and call the tools in a single step
+            relevant_tools, tool_results = await self.mcp_manager.select_and_call(prompt)
+            
+            if not relevant_tools:
+                return [], None
+            
+            logger.info("Found %d relevant MCP tools for query: %r", len(relevant_tools), relevant_tools)
+            
+            mcp_tools_used = [tool.tool_name for tool in tool_results if hasattr(tool, 'tool_name')]
+            
+            # Format tool results for context
+            tool_context = None
+            if tool_results and self.mcp_manager:
+                tool_context = self.mcp_manager.format_tool_results(tool_results) or None
+                if tool_context:
+                    logger.info("Added MCP tool results to context")
+            
+            return mcp_tools_used, tool_context
+            
+        except Exception as e:
+            logger.error("Error executing MCP tools: %s", e)
+            return [], None
+    
     async def generate_response(self, 
                               prompt: str,
                               conversation: Optional[Conversation] = None,
@@ -176,124 +453,369 @@ class AIService:
             AIServiceError: For general AI service errors
             AIProviderError: For provider-specific errors
         """
+        responses = await self._generate(prompt, conversation, additional_context)
+        return responses[0]
+    
+    async def generate_responses_batch(self,
+                                       prompts: List[str],
+                                       conversation: Optional[Conversation] = None,
+                                       additional_context: Optional[str] = None) -> List[AIResponse]:
+        """
+        Generate AI responses for several prompts that share the same context.
+        
+        Identical prompts are coalesced into a single provider request: OpenAI returns
+        one completion per caller from a request with ``n`` set to the number of
+        duplicates, while Anthropic's single response is shared between them. Distinct
+        prompts are sent concurrently.
+        
+        Args:
+            prompts: User messages/prompts to respond to
+            conversation: Conversation history for context
+            additional_context: Additional context to include
+            
+        Returns:
+            List of AIResponse objects in the same order as the prompts
+            
+        Raises:
+            AIServiceError: For general AI service errors
+            AIProviderError: For provider-specific errors
+        """
+        # Group duplicate prompts, remembering where each answer belongs
+        positions: Dict[str, List[int]] = {}
+        for index, prompt in enumerate(prompts):
+            positions.setdefault(prompt, []).append(index)
+        
+        grouped_responses = await asyncio.gather(*(
+            self._generate(prompt, conversation, additional_context, n=len(indices))
+            for prompt, indices in positions.items()
+        ))
+        
+        results: List[Optional[AIResponse]] = [None] * len(prompts)
+        for indices, responses in zip(positions.values(), grouped_responses):
+            for index, response in zip(indices, responses):
+                results[index] = response
+        return results
+    
+    async def generate_response_race(self,
+                                     prompt: str,
+                                     conversation: Optional[Conversation] = None,
+                                     additional_context: Optional[str] = None) -> AIResponse:
+        """
+        Generate AI response by asking every configured provider at once.
+        
+        The first successful response is returned and the other request is cancelled,
+        which cuts tail latency when either provider's answer is acceptable. The current
+        model is used for the active provider and the default model for the other one.
+        Falls back to generate_response when only one provider is configured.
+        
+        Args:
+            prompt: User's message/prompt
+            conversation: Conversation history for context
+            additional_context: Additional context to include
+            
+        Returns:
+            AIResponse object from the fastest successful provider
+            
+        Raises:
+            AIServiceError: For general AI service errors
+            AIProviderError: If every provider fails
+        """
+        if not (self._openai_client and self._anthropic_client):
+            return await self.generate_response(prompt, conversation, additional_context)
+        
         try:
-            mcp_tools_used = []
+            mcp_tools_used, context = await self._prepare_context(prompt, conversation, additional_context)
             
-            # Check for relevant MCP tools
-            relevant_tools = await self.get_relevant_tools(prompt)
+            openai_model = self.model if self.provider == AIProvider.OPENAI else DEFAULT_MODELS[AIProvider.OPENAI]
+            anthropic_model = self.model if self.provider == AIProvider.ANTHROPIC else DEFAULT_MODELS[AIProvider.ANTHROPIC]
+            pending = {
+                asyncio.create_task(self._generate_openai_responses(context, model=openai_model)),
+                asyncio.create_task(self._generate_anthropic_response(context, model=anthropic_model))
+            }
             
-            # If we have relevant tools, call them and add results to context
-            if relevant_tools:
-                logger.info(f"Found {len(relevant_tools)} relevant MCP tools for query: {relevant_tools}")
+            try:
+                error = None
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is not None:
+                            # Keep waiting for the other provider
+                            error = task.exception()
+                            continue
+                        
+                        result = task.result()
+                        response = result[0] if isinstance(result, list) else result
+                        response.mcp_tools_used = list(mcp_tools_used)
+                        return response
+                raise error
+            finally:
+                for task in pending:
+                    task.cancel()
                 
-                try:
-                    tool_results = await self.call_mcp_tools(relevant_tools)
-                    mcp_tools_used = [tool.tool_name for tool in tool_results if hasattr(tool, 'tool_name')]
-                    
-                    # Format tool results for context
-                    if tool_results and self.mcp_manager:
-                        tool_context = self.mcp_manager.format_tool_results(tool_results)
-                        if tool_context:
-                            if additional_context:
-                                additional_context += f"\n\n{tool_context}"
-                            else:
-                                additional_context = tool_context
-                            logger.info(f"Added MCP tool results to context")
-                    
-                except Exception as e:
-                    logger.error(f"Error executing MCP tools: {e}")
-                    mcp_tools_used = []
-            
-            # Build conversation context
-            messages = self.build_context(conversation, additional_context)
-            
-            # Add the current prompt
-            messages.append({"role": "user", "content": prompt})
+        except (asyncio.TimeoutError, openai.APITimeoutError, anthropic.APITimeoutError):
+            logger.error("AI request timed out after %s seconds", self.timeout)
+            raise AIServiceError(f"Request timed out after {self.timeout} seconds. This may be due to complex MCP operations or slow external services.")
+        except (openai.APIError, anthropic.APIError, AIServiceError) as e:
+            # Only provider failures are translated; anything else is a bug and propagates as is
+            logger.error("Error generating AI response: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            raise AIProviderError(f"Provider error: {str(e)}")
+    
+    async def stream_response(self,
+                              prompt: str,
+                              conversation: Optional[Conversation] = None,
+                              additional_context: Optional[str] = None) -> AsyncIterator[AIResponseDelta]:
+        """
+        Stream an AI response for the given prompt as it is generated.
+        
+        Yields a delta for each piece of text received from the provider, followed by
+        a final delta with empty content carrying the finish reason and MCP tools used.
+        
+        Args:
+            prompt: User's message/prompt
+            conversation: Conversation history for context
+            additional_context: Additional context to include
+            
+        Raises:
+            AIServiceError: For general AI service errors
+            AIProviderError: For provider-specific errors
+        """
+        try:
+            mcp_tools_used, context = await self._prepare_context(prompt, conversation, additional_context)
+            
+            if self.provider == AIProvider.OPENAI:
+                stream = self._stream_openai_response(context)
+            elif self.provider == AIProvider.ANTHROPIC:
+                stream = self._stream_anthropic_response(context)
+            else:
+                raise AIServiceError(f"Unsupported provider: {self.provider}")
+            
+            async for delta in stream:
+                if delta.finish_reason is not None:
+                    delta.mcp_tools_used = list(mcp_tools_used)
+                yield delta
+                
+        except (asyncio.TimeoutError, openai.APITimeoutError, anthropic.APITimeoutError):
+            logger.error("AI request timed out after %s seconds", self.timeout)
+            raise AIServiceError(f"Request timed out after {self.timeout} seconds. This may be due to complex MCP operations or slow external services.")
+        except (openai.APIError, anthropic.APIError, AIServiceError) as e:
+            # Only provider failures are translated; anything else is a bug and propagates as is
+            logger.error("Error streaming AI response: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            raise AIProviderError(f"Provider error: {str(e)}")
+    
+    async def _prepare_context(self,
+                               prompt: str,
+                               conversation: Optional[Conversation] = None,
+                               additional_context: Optional[str] = None) -> Tuple[List[str], Dict[str, Any]]:
+        """
+        Build the provider context for a prompt, including any MCP tool results.
+        
+        Returns:
+            Tuple of (MCP tools used, context with the prompt appended to its messages)
+        """
+        mcp_tools_used = []
+        
+        # Only go to the MCP servers when the prompt could plausibly need tools
+        if self._needs_tools(prompt):
+            mcp_tools_used, tool_context = await self._get_tool_context(prompt)
+            if tool_context:
+                if additional_context:
+                    additional_context += f"\n\n{tool_context}"
+                else:
+                    additional_context = tool_context
+        
+        # Build conversation context
+        context = self.build_context(conversation, additional_context)
+        
+        # Add the current prompt
+        context["messages"].append({"role": "user", "content": prompt})
+        context["tokens"] += _estimate_text_tokens(prompt)
+        return mcp_tools_used, context
+    
+    async def _generate(self,
+                        prompt: str,
+                        conversation: Optional[Conversation] = None,
+                        additional_context: Optional[str] = None,
+                        n: int = 1) -> List[AIResponse]:
+        """
+        Generate n AI responses for a prompt, with MCP tool integration.
+        
+        Raises:
+            AIServiceError: For general AI service errors
+            AIProviderError: For provider-specific errors
+        """
+        try:
+            mcp_tools_used, context = await self._prepare_context(prompt, conversation, additional_context)
             
             # Generate response based on provider
             if self.provider == AIProvider.OPENAI:
-                response = await self._generate_openai_response(messages)
+                responses = await self._generate_openai_responses(context, n)
             elif self.provider == AIProvider.ANTHROPIC:
-                response = await self._generate_anthropic_response(messages)
+                # Anthropic has no multi-completion option, so duplicates share one answer
+                response = await self._generate_anthropic_response(context)
+                responses = [response] + [replace(response) for _ in range(n - 1)]
             else:
                 raise AIServiceError(f"Unsupported provider: {self.provider}")
             
-            # Add MCP tools used to the response
-            response.mcp_tools_used = mcp_tools_used
-            return response
+            # Add MCP tools used to the responses
+            for response in responses:
+                response.mcp_tools_used = list(mcp_tools_used)
+            return responses
                 
-        except asyncio.TimeoutError:
-            logger.error(f"AI request timed out after {self.timeout} seconds")
+        except (asyncio.TimeoutError, openai.APITimeoutError, anthropic.APITimeoutError):
+            logger.error("AI request timed out after %s seconds", self.timeout)
             raise AIServiceError(f"Request timed out after {self.timeout} seconds. This may be due to complex MCP operations or slow external services.")
-        except Exception as e:
-            logger.error(f"Error generating AI response: {str(e)}")
+        except (openai.APIError, anthropic.APIError, AIServiceError) as e:
+            # Only provider failures are translated; anything else is a bug and propagates as is
+            logger.error("Error generating AI response: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             raise AIProviderError(f"Provider error: {str(e)}")
     
-    async def _generate_openai_response(self, messages: List[Dict[str, str]]) -> AIResponse:
-        """Generate response using OpenAI API"""
+    async def _generate_openai_responses(self,
+                                         context: Dict[str, Any],
+                                         n: int = 1,
+                                         model: Optional[str] = None) -> List[AIResponse]:
+        """Generate n alternative responses using OpenAI API in a single request"""
+        model = model or self.model
         try:
-            response = await asyncio.wait_for(
-                self._openai_client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    max_tokens=1000,
-                    temperature=0.7
-                ),
+            # OpenAI expects the system prompt as the first message
+            messages = [{"role": "system", "content": context["system"]}, *context["messages"]]
+            
+            limiter = _get_rate_limiter(AIProvider.OPENAI)
+            if limiter:
+                # Completion tokens count against the limit once per choice
+                await limiter.acquire(_estimate_tokens(context, 1000 * n))
+            
+            # The SDK enforces the timeout at the HTTP layer, so an expired request
+            # does not cancel the task mid-read and poison the pooled connection
+            response = await self._openai_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=1000,
+                temperature=0.7,
+                n=n,
                 timeout=self.timeout
             )
             
-            content = response.choices[0].message.content
-            tokens_used = response.usage.total_tokens if response.usage else None
-            finish_reason = response.choices[0].finish_reason
+            # Usage covers the whole request, so split it across the choices
+            usage = getattr(response, "usage", None)
+            tokens_used = usage.total_tokens // n if usage else None
             
-            return AIResponse(
-                content=content,
-                provider="openai",
-                model=self.model,
-                tokens_used=tokens_used,
-                finish_reason=finish_reason
-            )
+            return [
+                AIResponse(
+                    content=choice.message.content,
+                    provider="openai",
+                    model=model,
+                    tokens_used=tokens_used,
+                    finish_reason=choice.finish_reason
+                )
+                for choice in response.choices[:n]
+            ]
             
+        except openai.APITimeoutError:
+            # Reported as a timeout by _generate rather than as a provider error
+            raise
         except openai.APIError as e:
-            logger.error(f"OpenAI API error: {str(e)}")
+            logger.error("OpenAI API error: %s", e)
             raise AIProviderError(f"OpenAI API error: {str(e)}")
     
-    async def _generate_anthropic_response(self, messages: List[Dict[str, str]]) -> AIResponse:
+    async def _generate_anthropic_response(self,
+                                           context: Dict[str, Any],
+                                           model: Optional[str] = None) -> AIResponse:
         """Generate response using Anthropic API"""
+        model = model or self.model
         try:
-            # Anthropic expects system message separately
-            system_message = ""
-            formatted_messages = []
+            limiter = _get_rate_limiter(AIProvider.ANTHROPIC)
+            if limiter:
+                await limiter.acquire(_estimate_tokens(context, 1000))
             
-            for msg in messages:
-                if msg["role"] == "system":
-                    system_message = msg["content"]
-                else:
-                    formatted_messages.append(msg)
-            
-            response = await asyncio.wait_for(
-                self._anthropic_client.messages.create(
-                    model=self.model,
-                    max_tokens=1000,
-                    system=system_message,
-                    messages=formatted_messages
-                ),
+            # Anthropic takes the system prompt separately from the messages
+            response = await self._anthropic_client.messages.create(
+                model=model,
+                max_tokens=1000,
+                system=context["system"],
+                messages=context["messages"],
                 timeout=self.timeout
             )
             
-            content = response.content[0].text
-            tokens_used = response.usage.input_tokens + response.usage.output_tokens
+            usage = response.usage
             
             return AIResponse(
-                content=content,
+                content=response.content[0].text,
                 provider="anthropic",
-                model=self.model,
-                tokens_used=tokens_used,
+                model=model,
+                tokens_used=usage.input_tokens + usage.output_tokens,
                 finish_reason=response.stop_reason
             )
             
+        except anthropic.APITimeoutError:
+            # Reported as a timeout by _generate rather than as a provider error
+            raise
+        except anthropic.APIError as e:
+            logger.error("Anthropic API error: %s", e)
+            raise AIProviderError(f"Anthropic API error: {str(e)}")
+    
+    async def _stream_openai_response(self, context: Dict[str, Any]) -> AsyncIterator[AIResponseDelta]:
+        """Stream response deltas using OpenAI API"""
+        try:
+            messages = [{"role": "system", "content": context["system"]}, *context["messages"]]
+            
+            limiter = _get_rate_limiter(AIProvider.OPENAI)
+            if limiter:
+                await limiter.acquire(_estimate_tokens(context, 1000))
+            
+            stream = await self._openai_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=1000,
+                temperature=0.7,
+                stream=True,
+                timeout=self.timeout
+            )
+            
+            finish_reason = None
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    yield AIResponseDelta(content=choice.delta.content)
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+            
+            yield AIResponseDelta(content="", finish_reason=finish_reason or "stop")
+            
+        except openai.APITimeoutError:
+            # Reported as a timeout by stream_response rather than as a provider error
+            raise
+        except openai.APIError as e:
+            logger.error("OpenAI API error: %s", e)
+            raise AIProviderError(f"OpenAI API error: {str(e)}")
+    
+    async def _stream_anthropic_response(self, context: Dict[str, Any]) -> AsyncIterator[AIResponseDelta]:
+        """Stream response deltas using Anthropic API"""
+        try:
+            limiter = _get_rate_limiter(AIProvider.ANTHROPIC)
+            if limiter:
+                await limiter.acquire(_estimate_tokens(context, 1000))
+            
+            async with self._anthropic_client.messages.stream(
+                model=self.model,
+                max_tokens=1000,
+                system=context["system"],
+                messages=context["messages"],
+                timeout=self.timeout
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield AIResponseDelta(content=text)
+                
+                final_message = await stream.get_final_message()
+            
+            yield AIResponseDelta(content="", finish_reason=final_message.stop_reason or "end_turn")
+            
+        except anthropic.APITimeoutError:
+            # Reported as a timeout by stream_response rather than as a provider error
+            raise
         except anthropic.APIError as e:
-            logger.error(f"Anthropic API error: {str(e)}")
+            logger.error("Anthropic API error: %s", e)
             raise AIProviderError(f"Anthropic API error: {str(e)}")
     
     def get_available_providers(self) -> List[str]:
@@ -319,4 +841,4 @@ class AIService:
             # Set default model for provider
             self.model = "gpt-3.5-turbo" if provider == AIProvider.OPENAI else "claude-3-sonnet-20240229"
         
-        logger.info(f"Switched to provider: {provider.value}, model: {self.model}")
\ No newline at end of file
+        logger.info("Switched to provider: %s, model: %s", provider.value, self.model)
\ No newline at end of file
@@ -3,12 +3,20 @@ MCP Protocol Client for communicating with MCP servers using JSON-RPC
 """
 
 import asyncio
+import hashlib
+import heapq
+import itertools
 import json
 import logging
+import random
+import re
 import time
-from typing import Dict, List, Any, Optional, Union
-from urllib.parse import urlparse
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Set, Tuple, Union
 import aiohttp
+import ijson
+import orjson
 import websockets
 from websockets.exceptions import ConnectionClosed, WebSocketException
 
@@ -16,12 +24,95 @@ from models.mcp import MCPServerConfig, MCPToolCall
 
 logger = logging.getLogger(__name__)
 
+# Fixed payloads encoded once: the ping request only varies by id, and the
+# initialized notification never changes
+PING_TEMPLATE = b'{"jsonrpc":"2.0","id":%s,"method":"ping","params":{}}'
+INITIALIZED_NOTIFICATION = orjson.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+# Endpoint URL schemes per transport
+WS_SCHEMES = frozenset({"ws", "wss"})
+HTTP_SCHEMES = frozenset({"http", "https"})
+
+# Largest WebSocket message accepted (large tool outputs), and the keepalive
+# ping interval/timeout that keeps idle connections open through NATs
+WS_MAX_MESSAGE_SIZE = 2 ** 24
+WS_PING_INTERVAL = 20
+
+# aiohttp only sets this header itself for json=, not for pre-encoded bodies
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# tools/list over HTTP is parsed as it arrives, in chunks of this many bytes
+TOOLS_STREAM_CHUNK_SIZE = 2 ** 16
+
+# Concurrent requests are coalesced into JSON-RPC batches of at most this many
+# requests. The window is how long to wait for more requests before sending;
+# with 0 only requests issued in the same event loop iteration are combined.
+REQUEST_BATCH_MAX = 32
+REQUEST_BATCH_WINDOW = 0.0
+
+# 4xx statuses returned for reasons other than the request body, which
+# don't show that the server rejects batches
+NON_REJECTION_STATUSES = frozenset({401, 403, 407, 408, 429})
+
+# Sends (single requests or whole batches) in flight at once, sized to the
+# HTTP connection pool so bursts queue here rather than inside aiohttp
+MAX_INFLIGHT_SENDS = 16
+
+# Successful results of cacheable tools are reused for identical arguments
+TOOL_RESULT_CACHE_SIZE = 256
+TOOL_RESULT_CACHE_TTL = 60
+
+# JSON-RPC error code for unknown methods
+METHOD_NOT_FOUND = -32601
+
+# Health check pings as (timeout, delay before the next attempt) pairs; only
+# timeouts are retried
+HEALTH_CHECK_ATTEMPTS = ((2, 0.0), (4, 0.25), (8, 1.0))
+HEALTH_CHECK_JITTER = 0.1
+
+# Keyword search over tools: token pattern and per-field weights
+SEARCH_TOKEN_RE = re.compile(r"[a-z0-9]{3,}")
+SEARCH_FIELD_WEIGHTS = {"name": 2.0, "description": 1.0, "tags": 2.0}
+
+# Tool definitions shared by content hash, so rediscovery and clients of the same
+# server reuse one dict per distinct schema. Shared dicts must not be mutated.
+SCHEMA_CACHE_SIZE = 1024
+_schema_cache: Dict[str, Dict[str, Any]] = {}
+
+
+def _intern_tools(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace each tool definition with the shared copy of an identical definition"""
+    interned = []
+    for tool in tools:
+        key = hashlib.blake2b(orjson.dumps(tool, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+        shared = _schema_cache.get(key)
+        if shared is None:
+            if len(_schema_cache) >= SCHEMA_CACHE_SIZE:
+                _schema_cache.pop(next(iter(_schema_cache)))
+            shared = _schema_cache[key] = tool
+        interned.append(shared)
+    return interned
+
+
+@lru_cache(maxsize=16)
+def _client_timeout(total: int) -> aiohttp.ClientTimeout:
+    """Shared ClientTimeout per distinct timeout value"""
+    return aiohttp.ClientTimeout(total=total)
+
 
 class MCPConnectionError(Exception):
     """Raised when MCP server connection fails"""
     pass
 
 
+class MCPHTTPStatusError(MCPConnectionError):
+    """Raised when an MCP server answers an HTTP request with an error status"""
+    
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
 class MCPProtocolError(Exception):
     """Raised when MCP protocol communication fails"""
     pass
@@ -32,6 +123,12 @@ class MCPTimeoutError(Exception):
     pass
 
 
+async def health_check_all(clients: List["MCPProtocolClient"]) -> List[bool]:
+    """Health check several clients concurrently; errors count as unhealthy"""
+    results = await asyncio.gather(*(client._probe_health() for client in clients), return_exceptions=True)
+    return [result is True for result in results]
+
+
 class MCPProtocolClient:
     """
     MCP Protocol Client for JSON-RPC communication with MCP servers
@@ -40,28 +137,112 @@ class MCPProtocolClient:
     
     def __init__(self, config: MCPServerConfig):
         self.config = config
+        self._scheme = config.endpoint.split("://", 1)[0].lower() if "://" in config.endpoint else ""
         self.session: Optional[aiohttp.ClientSession] = None
         self.websocket: Optional[websockets.WebSocketServerProtocol] = None
-        self.connection_type: Optional[str] = None
+        self.connection_type = None
         self.is_connected = False
-        self.available_tools: List[Dict[str, Any]] = []
+        self.available_tools = []
         self.server_info: Dict[str, Any] = {}
-        self._request_id_counter = 0
+        self._next_id = itertools.count(1).__next__
+        
+        # Request batching; pending entries are (request, future, timeout)
+        self.batch_max = REQUEST_BATCH_MAX
+        self.batch_window = REQUEST_BATCH_WINDOW
+        self._pending_requests: List[Tuple[Dict[str, Any], asyncio.Future, int]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batching_supported = True
+        # Created on first use, inside the event loop that sends (Python < 3.10
+        # binds asyncio primitives to the loop current at construction)
+        self._inflight: Optional[asyncio.Semaphore] = None
         
+        # HTTP notifications are posted in the background
+        self._pending_notifications: Set[asyncio.Task] = set()
+        
+        # WebSocket responses are routed to waiting requests by id
+        self._ws_pending: Dict[Any, asyncio.Future] = {}
+        self._ws_reader: Optional[asyncio.Task] = None
+        
+        # Results of read-only/idempotent tools: cache key -> (expiry time, tool call)
+        self._memoizable_tools = set(config.cacheable_tools)
+        self._result_cache: Dict[str, Tuple[float, MCPToolCall]] = {}
+        self._inflight_tool_calls: Dict[str, asyncio.Future] = {}
+        
+        # Cleared once the server answers ping with METHOD_NOT_FOUND
+        self._ping_supported = True
+        
+    @property
+    def connection_type(self) -> Optional[str]:
+        """Active transport: "websocket", "http" or None"""
+        return self._connection_type
+    
+    @connection_type.setter
+    def connection_type(self, value: Optional[str]) -> None:
+        # Bind the transport's send methods once so the send path doesn't branch per request
+        self._connection_type = value
+        if value == "websocket":
+            self._send_impl = self._send_websocket_request
+            self._send_raw_impl = self._send_websocket_raw
+            self._notify_impl = self._send_websocket_notification
+        elif value == "http":
+            self._send_impl = self._send_http_request
+            self._send_raw_impl = self._send_http_raw
+            self._notify_impl = self._send_http_notification
+        else:
+            self._send_impl = self._send_disconnected
+            self._send_raw_impl = self._send_disconnected
+            self._notify_impl = self._notify_disconnected
+    
+    @property
+    def available_tools(self) -> List[Dict[str, Any]]:
+        """Full tool definitions discovered on the server"""
+        return self._available_tools
+    
+    @available_tools.setter
+    def available_tools(self, tools: List[Dict[str, Any]]) -> None:
+        # Names and descriptions are kept as parallel lists so lookups and
+        # searches scan plain strings instead of the definition dicts
+        self._available_tools = tools
+        self._tools_view = tuple(tools)
+        self._tool_schemas: Dict[str, Dict[str, Any]] = {}
+        self._tool_names: List[str] = []
+        self._tool_descriptions: List[str] = []
+        # Keyword index: token -> [(index into _tool_names, weight)]
+        self._tool_index: Dict[str, List[Tuple[int, float]]] = {}
+        for tool in tools:
+            name = tool.get("name")
+            if name:
+                description = tool.get("description") or ""
+                self._index_tool(len(self._tool_names), name, description, tool.get("tags") or [])
+                self._tool_schemas[name] = tool
+                self._tool_names.append(name)
+                self._tool_descriptions.append(description)
+        
+        # Compact name/summary list, built on first use
+        self._tool_summaries: Optional[List[Dict[str, str]]] = None
+    
+    def _index_tool(self, position: int, name: str, description: str, tags: List[str]) -> None:
+        """Add a tool's name, description and tag tokens to the keyword index"""
+        weights: Dict[str, float] = {}
+        fields = (("name", name), ("description", description), ("tags", " ".join(map(str, tags))))
+        for field_name, text in fields:
+            for token in SEARCH_TOKEN_RE.findall(text.lower()):
+                weights[token] = weights.get(token, 0.0) + SEARCH_FIELD_WEIGHTS[field_name]
+        for token, weight in weights.items():
+            self._tool_index.setdefault(token, []).append((position, weight))
+    
     async def connect(self) -> bool:
         """
         Establish connection to MCP server
         Returns True if connection successful, False otherwise
         """
         try:
-            parsed_url = urlparse(self.config.endpoint)
-            
-            if parsed_url.scheme in ['ws', 'wss']:
+            if self._scheme in WS_SCHEMES:
                 await self._connect_websocket()
-            elif parsed_url.scheme in ['http', 'https']:
+            elif self._scheme in HTTP_SCHEMES:
                 await self._connect_http()
             else:
-                raise MCPConnectionError(f"Unsupported protocol: {parsed_url.scheme}")
+                raise MCPConnectionError(f"Unsupported protocol: {self._scheme}")
             
             # Perform handshake and initialize connection
             await self._initialize_connection()
@@ -83,10 +264,15 @@ class MCPProtocolClient:
                 if 'api_key' in self.config.authentication:
                     extra_headers['Authorization'] = f"Bearer {self.config.authentication['api_key']}"
             
+            # JSON-RPC frames are mostly small, so deflate costs more CPU than it saves
             self.websocket = await websockets.connect(
                 self.config.endpoint,
                 extra_headers=extra_headers,
-                timeout=self.config.timeout
+                timeout=self.config.timeout,
+                compression="deflate" if self.config.ws_compression else None,
+                max_size=WS_MAX_MESSAGE_SIZE,
+                ping_interval=WS_PING_INTERVAL,
+                ping_timeout=WS_PING_INTERVAL
             )
             self.connection_type = "websocket"
             
@@ -94,19 +280,30 @@ class MCPProtocolClient:
             raise MCPConnectionError(f"WebSocket connection failed: {str(e)}")
     
     async def _connect_http(self) -> None:
-        """Establish HTTP session"""
+        """Establish HTTP session, reusing the existing one if it is still open"""
         try:
-            timeout = aiohttp.ClientTimeout(total=self.config.timeout)
-            headers = {}
-            
-            if self.config.authentication:
-                if 'api_key' in self.config.authentication:
-                    headers['Authorization'] = f"Bearer {self.config.authentication['api_key']}"
-            
-            self.session = aiohttp.ClientSession(
-                timeout=timeout,
-                headers=headers
-            )
+            if self.session is None or self.session.closed:
+                timeout = _client_timeout(self.config.timeout)
+                headers = {"Connection": "keep-alive"}
+                
+                if self.config.authentication:
+                    if 'api_key' in self.config.authentication:
+                        headers['Authorization'] = f"Bearer {self.config.authentication['api_key']}"
+                
+                # Keep idle connections around long enough to be reused between tool calls
+                connector = aiohttp.TCPConnector(
+                    limit=32,
+                    limit_per_host=MAX_INFLIGHT_SENDS,
+                    keepalive_timeout=75,
+                    enable_cleanup_closed=True,
+                    ttl_dns_cache=300
+                )
+                
+                self.session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=timeout,
+                    headers=headers
+                )
             self.connection_type = "http"
             
         except Exception as e:
@@ -132,8 +329,8 @@ class MCPProtocolClient:
             
             self.server_info = init_response.get("result", {})
             
-            # Send initialized notification
-            await self._send_notification("notifications/initialized")
+            # Send initialized notification; it must reach the server before tools/list
+            await self._send_notification("notifications/initialized", background=False)
             
             # Discover available tools
             await self._discover_tools()
@@ -144,32 +341,114 @@ class MCPProtocolClient:
     async def _discover_tools(self) -> None:
         """Discover available tools from the MCP server"""
         try:
-            tools_response = await self._send_request("tools/list", {})
-            
-            if tools_response.get("error"):
-                logger.warning(f"Tool discovery failed for {self.config.name}: {tools_response['error']}")
-                return
-            
-            tools_result = tools_response.get("result", {})
-            self.available_tools = tools_result.get("tools", [])
+            if self._connection_type == "http":
+                self.available_tools, self._tool_summaries = await self._stream_http_tools()
+            else:
+                tools_response = await self._send_request("tools/list", {})
+                
+                if tools_response.get("error"):
+                    logger.warning(f"Tool discovery failed for {self.config.name}: {tools_response['error']}")
+                    return
+                
+                tools_result = tools_response.get("result", {})
+                self.available_tools = _intern_tools(tools_result.get("tools", []))
             
             # Update config with discovered tools
-            tool_names = [tool.get("name") for tool in self.available_tools if tool.get("name")]
+            tool_names = self._tool_names
             self.config.available_tools = tool_names
             
+            # Tools the server declares read-only or idempotent can have their results cached
+            for tool in self.available_tools:
+                annotations = tool.get("annotations") or {}
+                if tool.get("name") and (annotations.get("readOnlyHint") or annotations.get("idempotentHint")):
+                    self._memoizable_tools.add(tool["name"])
+            
             logger.info(f"Discovered {len(self.available_tools)} tools for {self.config.name}: {tool_names}")
             
         except Exception as e:
             logger.error(f"Tool discovery failed for {self.config.name}: {str(e)}")
     
+    async def _stream_http_tools(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        """
+        Fetch tools/list over HTTP, parsing the tools array one tool at a time
+        so large tool lists are never held as raw bytes and a parsed copy at once
+        Returns (tool definitions, tool summaries)
+        """
+        if not self.session:
+            raise MCPConnectionError("HTTP session not available")
+        
+        request = {
+            "jsonrpc": "2.0",
+            "id": self._get_next_request_id(),
+            "method": "tools/list",
+            "params": {}
+        }
+        
+        tools = []
+        summaries = []
+        
+        def add_tools(parsed_tools: List[Dict[str, Any]]) -> None:
+            for tool in _intern_tools(parsed_tools):
+                tools.append(tool)
+                if tool.get("name"):
+                    summaries.append(self._summarize_tool(tool["name"], tool.get("description") or ""))
+            del parsed_tools[:]
+        
+        # The same bytes feed two parsers: tools as they complete, and a JSON-RPC error
+        parsed_tools = ijson.sendable_list()
+        errors = ijson.sendable_list()
+        parsers = (
+            ijson.items_coro(parsed_tools, "result.tools.item", use_float=True),
+            ijson.items_coro(errors, "error", use_float=True),
+        )
+        # Error statuses are checked after the body, which may carry a JSON-RPC error
+        status = None
+        try:
+            async with self.session.post(
+                self.config.endpoint,
+                data=orjson.dumps(request),
+                headers=JSON_HEADERS
+            ) as response:
+                status = response.status
+                async for chunk in response.content.iter_chunked(TOOLS_STREAM_CHUNK_SIZE):
+                    for parser in parsers:
+                        parser.send(chunk)
+                    add_tools(parsed_tools)
+            
+            for parser in parsers:
+                parser.close()
+            add_tools(parsed_tools)
+                        
+        except aiohttp.ClientError as e:
+            raise MCPConnectionError(f"HTTP request failed: {str(e)}")
+        except ijson.JSONError as e:
+            # A non-JSON error page is reported by its status below
+            if status is None or status < 400:
+                raise MCPProtocolError(f"Invalid JSON response: {str(e)}")
+        
+        if errors:
+            raise MCPProtocolError(f"Failed to list tools: {errors[0]}")
+        if status >= 400:
+            raise MCPHTTPStatusError(status, f"HTTP {status} listing tools")
+        
+        return tools, summaries
+    
     async def disconnect(self) -> None:
         """Close connection to MCP server"""
         try:
+            if self._ws_reader:
+                self._ws_reader.cancel()
+                self._ws_reader = None
+            self._fail_ws_pending(MCPConnectionError("Disconnected from MCP server"))
+            
             if self.websocket:
                 await self.websocket.close()
                 self.websocket = None
             
             if self.session:
+                # Let notifications still being posted finish before closing the session
+                if self._pending_notifications:
+                    await asyncio.gather(*self._pending_notifications, return_exceptions=True)
                 await self.session.close()
                 self.session = None
             
@@ -184,18 +463,52 @@ class MCPProtocolClient:
         """
         Check if the MCP server is healthy and responsive
         Returns True if healthy, False otherwise
+        Raises NotImplementedError if the server does not support ping
         """
         if not self.is_connected:
             return False
         
+        # Retry timeouts with a longer timeout each time, so a slow reply isn't taken as a dead server
+        for attempt, (timeout, delay) in enumerate(HEALTH_CHECK_ATTEMPTS, 1):
+            try:
+                # Send a simple ping request, filling the id into the pre-encoded payload
+                request_id = self._get_next_request_id()
+                response = await self._send_raw(PING_TEMPLATE % orjson.dumps(request_id), request_id, timeout=timeout)
+                error = response.get("error")
+                if isinstance(error, dict) and error.get("code") == METHOD_NOT_FOUND:
+                    raise NotImplementedError(f"MCP server {self.config.name} does not support ping")
+                return not error
+                
+            except NotImplementedError:
+                raise
+            except MCPTimeoutError as e:
+                logger.debug(f"Health check attempt {attempt} timed out for {self.config.name}: {str(e)}")
+                if attempt < len(HEALTH_CHECK_ATTEMPTS):
+                    await asyncio.sleep(delay + random.random() * HEALTH_CHECK_JITTER)
+            except Exception as e:
+                logger.warning(f"Health check failed for {self.config.name}: {str(e)}")
+                return False
+        
+        logger.warning(f"Health check timed out for {self.config.name}")
+        return False
+    
+    async def _probe_health(self) -> bool:
+        """
+        Health check for bulk use: servers without ping support are probed
+        with tools/list instead of raising NotImplementedError
+        """
+        if self._ping_supported:
+            try:
+                return await self.health_check()
+            except NotImplementedError as e:
+                logger.info(f"{str(e)}; health checking it with tools/list instead")
+                self._ping_supported = False
+        
         try:
-            # Send a simple ping request
-            response = await self._send_request("ping", {}, timeout=5)
-            return not response.get("error")
-            
-        except Exception as e:
-            logger.warning(f"Health check failed for {self.config.name}: {str(e)}")
+            await self.list_tools()
+        except Exception:
             return False
+        return True
     
     async def list_tools(self) -> List[Dict[str, Any]]:
         """
@@ -212,7 +525,7 @@ class MCPProtocolClient:
                 raise MCPProtocolError(f"Failed to list tools: {response['error']}")
             
             result = response.get("result", {})
-            return result.get("tools", [])
+            return _intern_tools(result.get("tools", []))
             
         except Exception as e:
             logger.error(f"Failed to list tools for {self.config.name}: {str(e)}")
@@ -221,8 +534,43 @@ class MCPProtocolClient:
     async def call_tool(self, tool_name: str, parameters: Dict[str, Any]) -> MCPToolCall:
         """
         Call a tool on the MCP server
+        Results of cacheable tools are reused for identical arguments, and
+        concurrent identical calls share a single request
         Returns MCPToolCall with result or error
         """
+        if tool_name not in self._memoizable_tools or not self.is_connected:
+            return await self._execute_tool_call(tool_name, parameters)
+        
+        key = hashlib.sha256(
+            json.dumps({"t": tool_name, "p": parameters}, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        
+        cached = self._result_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1].model_copy(deep=True)
+        
+        inflight = self._inflight_tool_calls.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._execute_tool_call(tool_name, parameters))
+            self._inflight_tool_calls[key] = inflight
+            try:
+                tool_call = await asyncio.shield(inflight)
+            finally:
+                self._inflight_tool_calls.pop(key, None)
+            
+            if tool_call.status == "success":
+                # Keep the cache bounded by evicting the oldest entry
+                self._result_cache.pop(key, None)
+                if len(self._result_cache) >= TOOL_RESULT_CACHE_SIZE:
+                    self._result_cache.pop(next(iter(self._result_cache)))
+                self._result_cache[key] = (time.monotonic() + TOOL_RESULT_CACHE_TTL, tool_call.model_copy(deep=True))
+            return tool_call
+        
+        tool_call = await asyncio.shield(inflight)
+        return tool_call.model_copy(deep=True)
+    
+    async def _execute_tool_call(self, tool_name: str, parameters: Dict[str, Any]) -> MCPToolCall:
+        """Send a tool call to the MCP server and record the outcome"""
         tool_call = MCPToolCall(
             server_name=self.config.name,
             tool_name=tool_name,
@@ -233,47 +581,40 @@ class MCPProtocolClient:
             tool_call.mark_error("Not connected to MCP server")
             return tool_call
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             response = await self._send_request("tools/call", {
                 "name": tool_name,
                 "arguments": parameters
             })
-            
-            execution_time = time.time() - start_time
-            
-            if response.get("error"):
-                tool_call.mark_error(str(response["error"]), execution_time)
-            else:
-                result = response.get("result", {})
-                tool_call.mark_success(result, execution_time)
-            
+        except (MCPTimeoutError, asyncio.TimeoutError):
+            tool_call.mark_timeout(time.perf_counter() - start_time)
             return tool_call
-            
-        except MCPTimeoutError:
-            execution_time = time.time() - start_time
-            tool_call.mark_timeout(execution_time)
-            return tool_call
-            
-        except asyncio.TimeoutError:
-            execution_time = time.time() - start_time
-            tool_call.mark_timeout(execution_time)
-            return tool_call
-            
         except Exception as e:
-            execution_time = time.time() - start_time
-            tool_call.mark_error(str(e), execution_time)
+            tool_call.mark_error(str(e), time.perf_counter() - start_time)
             return tool_call
+        
+        execution_time = time.perf_counter() - start_time
+        
+        if not isinstance(response, dict):
+            tool_call.mark_error(f"Invalid response: {response!r}", execution_time)
+        elif response.get("error"):
+            tool_call.mark_error(str(response["error"]), execution_time)
+        else:
+            result = response.get("result", {})
+            tool_call.mark_success(result, execution_time)
+        
+        return tool_call
     
-    def _get_next_request_id(self) -> str:
-        """Generate next request ID"""
-        self._request_id_counter += 1
-        return f"{self.config.name}-{self._request_id_counter}"
+    def _get_next_request_id(self) -> int:
+        """Generate next request ID (ids are per-client, so a plain counter suffices)"""
+        return self._next_id()
     
     async def _send_request(self, method: str, params: Dict[str, Any], timeout: Optional[int] = None) -> Dict[str, Any]:
         """
         Send JSON-RPC request to MCP server
+        Concurrent requests are sent together as a JSON-RPC batch
         Returns response dictionary
         """
         request_id = self._get_next_request_id()
@@ -286,92 +627,342 @@ class MCPProtocolClient:
         
         timeout = timeout or self.config.timeout
         
+        if self._connection_type is None:
+            raise MCPProtocolError("No active connection")
+        
+        # Queue the request for the next batch and wait for its response
+        future = asyncio.get_running_loop().create_future()
+        self._pending_requests.append((request, future, timeout))
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush_requests())
+        
         try:
-            if self.connection_type == "websocket":
-                return await self._send_websocket_request(request, timeout)
-            elif self.connection_type == "http":
-                return await self._send_http_request(request, timeout)
-            else:
-                raise MCPProtocolError("No active connection")
-                
+            return await future
         except asyncio.TimeoutError:
             raise MCPTimeoutError(f"Request timed out after {timeout} seconds")
     
-    async def _send_notification(self, method: str, params: Optional[Dict[str, Any]] = None) -> None:
-        """Send JSON-RPC notification (no response expected)"""
-        notification = {
-            "jsonrpc": "2.0",
-            "method": method
-        }
+    async def _flush_requests(self) -> None:
+        """Send all queued requests, combining them into JSON-RPC batches"""
+        if self.batch_window:
+            await asyncio.sleep(self.batch_window)
+        
+        # Requests queued from now on go out with the next flush
+        pending, self._pending_requests = self._pending_requests, []
+        self._flush_task = None
         
-        if params:
-            notification["params"] = params
+        await asyncio.gather(*(
+            self._send_batch(pending[start:start + self.batch_max])
+            for start in range(0, len(pending), self.batch_max)
+        ))
+    
+    async def _send_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future, int]]) -> None:
+        """Send a batch of requests and resolve each request's future with its response"""
+        if len(batch) == 1 or not self._batching_supported:
+            await asyncio.gather(*(self._send_single(request, future, timeout) for request, future, timeout in batch))
+            return
+        
+        futures = {request["id"]: future for request, future, _ in batch}
+        timeout = max(timeout for _, _, timeout in batch)
         
         try:
-            if self.connection_type == "websocket" and self.websocket:
-                await self.websocket.send(json.dumps(notification))
-            elif self.connection_type == "http" and self.session:
-                # For HTTP, notifications are typically sent as POST requests
-                async with self.session.post(
-                    self.config.endpoint,
-                    json=notification
-                ) as response:
-                    # Don't wait for response for notifications
-                    pass
-                    
+            responses = await self._send_payload([request for request, _, _ in batch], timeout)
+        except Exception as e:
+            if not self._is_batch_rejection(e):
+                # Outages and auth failures say nothing about batch support, so keep batching
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            logger.debug(f"Batch request to {self.config.name} was rejected: {str(e)}")
+            responses = None
+        
+        if not isinstance(responses, list):
+            # The server does not understand batches; fall back to one request per call
+            logger.info(f"MCP server {self.config.name} does not support batch requests")
+            self._batching_supported = False
+            await asyncio.gather(*(self._send_single(request, future, timeout) for request, future, timeout in batch))
+            return
+        
+        # Responses may come back in any order, so match them up by id
+        for response in responses:
+            future = futures.get(response.get("id")) if isinstance(response, dict) else None
+            if future is not None and not future.done():
+                future.set_result(response)
+        
+        for request_id, future in futures.items():
+            if not future.done():
+                future.set_exception(MCPProtocolError(f"No response for request {request_id}"))
+    
+    @staticmethod
+    def _is_batch_rejection(error: Exception) -> bool:
+        """Whether a failed batch send means the server refused the batch body itself"""
+        if isinstance(error, MCPHTTPStatusError):
+            # Servers without batch support often reject the request outright (e.g. HTTP 400)
+            return error.status < 500 and error.status not in NON_REJECTION_STATUSES
+        return isinstance(error, MCPProtocolError)
+    
+    async def _send_single(self, request: Dict[str, Any], future: asyncio.Future, timeout: int) -> None:
+        """Send a single request and resolve its future with the response"""
+        try:
+            response = await self._send_payload(request, timeout)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        
+        if not future.done():
+            future.set_result(response)
+    
+    async def _send_payload(self, payload: Union[Dict[str, Any], List[Dict[str, Any]]], timeout: int) -> Any:
+        """Send a JSON-RPC request or batch over the active connection"""
+        if self._inflight is None:
+            self._inflight = asyncio.Semaphore(MAX_INFLIGHT_SENDS)
+        async with self._inflight:
+            return await self._send_impl(payload, timeout)
+    
+    async def _send_raw(self, payload: bytes, request_id: Any, timeout: int) -> Dict[str, Any]:
+        """
+        Send a pre-encoded JSON-RPC request, bypassing batching
+        Returns response dictionary
+        """
+        try:
+            return await self._send_raw_impl(payload, request_id, timeout)
+        except asyncio.TimeoutError:
+            raise MCPTimeoutError(f"Request timed out after {timeout} seconds")
+    
+    async def _send_notification(self, method: str, params: Optional[Dict[str, Any]] = None,
+                                 background: bool = True) -> None:
+        """
+        Send JSON-RPC notification (no response expected)
+        
+        Args:
+            background: Over HTTP, post without waiting for the server's reply.
+                        Pass False where ordering matters, as in the handshake.
+        """
+        if method == "notifications/initialized" and not params:
+            payload = INITIALIZED_NOTIFICATION
+        else:
+            notification = {
+                "jsonrpc": "2.0",
+                "method": method
+            }
+            
+            if params:
+                notification["params"] = params
+            payload = orjson.dumps(notification)
+        
+        try:
+            await self._notify_impl(payload, background)
         except Exception as e:
             logger.warning(f"Failed to send notification to {self.config.name}: {str(e)}")
     
-    async def _send_websocket_request(self, request: Dict[str, Any], timeout: int) -> Dict[str, Any]:
-        """Send request via WebSocket"""
+    async def _send_disconnected(self, *args: Any) -> Any:
+        """Send method used while there is no active connection"""
+        raise MCPProtocolError("No active connection")
+    
+    async def _notify_disconnected(self, payload: bytes, background: bool = True) -> None:
+        """Notifications are dropped while there is no active connection"""
+    
+    async def _send_websocket_notification(self, payload: bytes, background: bool = True) -> None:
+        """Send an encoded notification via WebSocket"""
+        if self.websocket:
+            await self.websocket.send(payload.decode())
+    
+    async def _send_http_notification(self, payload: bytes, background: bool = True) -> None:
+        """Send an encoded notification via HTTP, by default without waiting for the response"""
+        if not self.session:
+            return
+        
+        if not background:
+            await self._post_notification(payload)
+            return
+        
+        task = asyncio.ensure_future(self._post_notification(payload))
+        self._pending_notifications.add(task)
+        task.add_done_callback(self._pending_notifications.discard)
+    
+    async def _post_notification(self, payload: bytes) -> None:
+        """POST a notification and drain the response, logging failures"""
+        try:
+            # For HTTP, notifications are typically sent as POST requests
+            async with self.session.post(
+                self.config.endpoint,
+                data=payload,
+                headers=JSON_HEADERS
+            ) as response:
+                await response.read()
+        except Exception as e:
+            logger.warning(f"Failed to send notification to {self.config.name}: {str(e)}")
+    
+    async def _send_websocket_request(self, request: Union[Dict[str, Any], List[Dict[str, Any]]], timeout: int) -> Any:
+        """
+        Send request or batch via WebSocket
+        Responses are delivered by the reader task, so several requests can be
+        in flight on the socket at once
+        """
+        requests = request if isinstance(request, list) else [request]
+        responses = await self._ws_exchange(
+            [item.get("id") for item in requests],
+            orjson.dumps(request).decode(),
+            timeout
+        )
+        return responses if isinstance(request, list) else responses[0]
+    
+    async def _send_websocket_raw(self, payload: bytes, request_id: Any, timeout: int) -> Dict[str, Any]:
+        """Send a pre-encoded request via WebSocket"""
+        responses = await self._ws_exchange([request_id], payload.decode(), timeout)
+        return responses[0]
+    
+    async def _ws_exchange(self, request_ids: List[Any], message: str, timeout: int) -> List[Dict[str, Any]]:
+        """Send an encoded message via WebSocket and wait for the responses to the given ids"""
         if not self.websocket:
             raise MCPConnectionError("WebSocket not connected")
         
+        loop = asyncio.get_running_loop()
+        futures = []
+        for request_id in request_ids:
+            future = loop.create_future()
+            self._ws_pending[request_id] = future
+            futures.append(future)
+        
         try:
-            await asyncio.wait_for(
-                self.websocket.send(json.dumps(request)),
-                timeout=timeout
-            )
+            await asyncio.wait_for(self.websocket.send(message), timeout=timeout)
             
-            response_str = await asyncio.wait_for(
-                self.websocket.recv(),
-                timeout=timeout
-            )
+            # Responses wait in the socket's buffer until the reader picks them up
+            if self._ws_reader is None or self._ws_reader.done():
+                self._ws_reader = asyncio.ensure_future(self._ws_read_loop(self.websocket))
             
-            return json.loads(response_str)
+            return await asyncio.wait_for(asyncio.gather(*futures), timeout=timeout)
             
         except (ConnectionClosed, WebSocketException) as e:
             self.is_connected = False
             raise MCPConnectionError(f"WebSocket connection lost: {str(e)}")
-        except json.JSONDecodeError as e:
-            raise MCPProtocolError(f"Invalid JSON response: {str(e)}")
+        finally:
+            for request_id in request_ids:
+                self._ws_pending.pop(request_id, None)
     
-    async def _send_http_request(self, request: Dict[str, Any], timeout: int) -> Dict[str, Any]:
-        """Send request via HTTP"""
+    async def _ws_read_loop(self, websocket: Any) -> None:
+        """Read WebSocket messages and hand each response to the request waiting for its id"""
+        try:
+            while True:
+                message = await websocket.recv()
+                try:
+                    data = orjson.loads(message)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Invalid JSON from {self.config.name}: {str(e)}")
+                    continue
+                
+                # Messages without a pending id (e.g. server notifications) are ignored
+                for response in data if isinstance(data, list) else [data]:
+                    if not isinstance(response, dict):
+                        continue
+                    future = self._ws_pending.pop(response.get("id"), None)
+                    if future is not None and not future.done():
+                        future.set_result(response)
+                        
+        except Exception as e:
+            if isinstance(e, (ConnectionClosed, WebSocketException)):
+                self.is_connected = False
+            self._fail_ws_pending(MCPConnectionError(f"WebSocket connection lost: {str(e)}"))
+    
+    def _fail_ws_pending(self, error: Exception) -> None:
+        """Fail every request still waiting for a WebSocket response"""
+        for future in self._ws_pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._ws_pending.clear()
+    
+    async def _send_http_request(self, request: Union[Dict[str, Any], List[Dict[str, Any]]], timeout: int) -> Any:
+        """Send request or batch via HTTP"""
+        return await self._http_exchange(orjson.dumps(request), timeout)
+    
+    async def _send_http_raw(self, payload: bytes, request_id: Any, timeout: int) -> Dict[str, Any]:
+        """Send a pre-encoded request via HTTP"""
+        return await self._http_exchange(payload, timeout)
+    
+    async def _http_exchange(self, body: bytes, timeout: int) -> Any:
+        """POST an encoded JSON-RPC body and return the decoded response"""
         if not self.session:
             raise MCPConnectionError("HTTP session not available")
         
+        # The session already applies the configured timeout; only override it when different
+        request_options = {}
+        if timeout != self.config.timeout:
+            request_options["timeout"] = _client_timeout(timeout)
+        
         try:
             async with self.session.post(
                 self.config.endpoint,
-                json=request,
-                timeout=aiohttp.ClientTimeout(total=timeout)
+                data=body,
+                headers=JSON_HEADERS,
+                **request_options
             ) as response:
-                response.raise_for_status()
-                return await response.json()
+                body = await response.read()
+                if response.status >= 400:
+                    raise MCPHTTPStatusError(response.status, f"HTTP {response.status}: {body[:200]!r}")
+                return orjson.loads(body)
                 
         except aiohttp.ClientError as e:
             raise MCPConnectionError(f"HTTP request failed: {str(e)}")
         except json.JSONDecodeError as e:
             raise MCPProtocolError(f"Invalid JSON response: {str(e)}")
     
-    def get_server_info(self) -> Dict[str, Any]:
-        """Get server information from initialization"""
-        return self.server_info.copy()
+    def get_server_info(self) -> Mapping[str, Any]:
+        """Get a read-only view of the server information from initialization"""
+        return MappingProxyType(self.server_info)
+    
+    def get_available_tools(self) -> Tuple[Dict[str, Any], ...]:
+        """
+        Get available tools as a tuple, built once per discovery
+        The tool definitions are shared and must not be modified
+        """
+        return self._tools_view
+    
+    def get_tool_summaries(self) -> List[Dict[str, str]]:
+        """
+        Get a compact list of available tools
+        Each entry has the tool name and the first sentence of its description,
+        which is enough for tool selection without carrying the full schemas
+        """
+        if self._tool_summaries is None:
+            self._tool_summaries = [
+                self._summarize_tool(name, description)
+                for name, description in zip(self._tool_names, self._tool_descriptions)
+            ]
+        return self._tool_summaries.copy()
+    
+    @staticmethod
+    def _summarize_tool(name: str, description: str) -> Dict[str, str]:
+        """Name and first sentence of the description of a tool"""
+        return {"name": name, "summary": description.split(". ", 1)[0][:120]}
     
-    def get_available_tools(self) -> List[Dict[str, Any]]:
-        """Get list of available tools"""
-        return self.available_tools.copy()
+    def find_tools(self, query: str, k: int = 10) -> List[str]:
+        """
+        Find tools matching a free-text query
+        Tools are scored by the weighted keyword matches of their name,
+        description and tags; returns up to k tool names, best match first
+        """
+        scores: Dict[int, float] = {}
+        for token in set(SEARCH_TOKEN_RE.findall(query.lower())):
+            for position, weight in self._tool_index.get(token, ()):
+                scores[position] = scores.get(position, 0.0) + weight
+        
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [self._tool_names[position] for position, _ in best]
+    
+    async def get_tool_schema(self, tool_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the full definition of a tool, including its input schema
+        Tools missing from the discovered list are looked up again on the server
+        Returns None if the server does not provide the tool
+        """
+        if tool_name not in self._tool_schemas and self.is_connected:
+            try:
+                self.available_tools = await self.list_tools()
+            except Exception as e:
+                logger.warning(f"Failed to refresh tools for {self.config.name}: {str(e)}")
+        
+        return self._tool_schemas.get(tool_name)
     
     def __str__(self) -> str:
         return f"MCPProtocolClient({self.config.name}, {self.config.endpoint}, connected={self.is_connected})"
\ No newline at end of file
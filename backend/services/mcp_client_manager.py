@@ -4,10 +4,13 @@ Coordinates multiple MCP clients and provides tool execution system
 """
 
 import asyncio
+import heapq
 import logging
-from typing import Dict, List, Optional, Any, Set
-from concurrent.futures import ThreadPoolExecutor
+import re
+from operator import itemgetter
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Any, Set, Tuple
 import time
+from types import MappingProxyType
 
 from models.mcp import MCPServerConfig, MCPToolCall
 from services.mcp_client import MCPProtocolClient, MCPConnectionError, MCPProtocolError
@@ -15,6 +18,40 @@ from services.mcp_config_manager import MCPConfigManager, MCPConfigurationError
 
 logger = logging.getLogger(__name__)
 
+# Splits tool names like "get_weather" or "get-weather" into searchable words
+NAME_TOKEN_SPLIT_RE = re.compile(r"[^a-z0-9]+")
+
+# Words of three or more characters in a lowercased query, split the same way as tool names
+QUERY_KEYWORD_RE = re.compile(r"[a-z0-9]{3,}")
+
+# Python types accepted for each JSON schema type. bool is a subclass of int,
+# so the numeric types are checked separately to keep True/False out of them.
+PARAMETER_TYPES = {
+    'string': str,
+    'number': (int, float),
+    'integer': int,
+    'boolean': bool,
+    'array': list,
+    'object': dict
+}
+
+# (lowercased name, name tokens, lowercased description, tool) used for keyword search of one tool
+ToolSearchEntry = Tuple[str, FrozenSet[str], str, Dict[str, Any]]
+# (input schema, required parameters, schema properties, needs validation) of one tool
+ToolDef = Tuple[Dict[str, Any], FrozenSet[str], Dict[str, Any], bool]
+# One server's tools with server_name added, their search entries, tool name -> ToolDef,
+# and the tool names in order
+ServerToolView = Tuple[List[Dict[str, Any]], List[ToolSearchEntry], Dict[str, ToolDef], Tuple[str, ...]]
+
+# Seconds between background health checks of connected servers
+HEALTH_CHECK_INTERVAL = 30
+
+# Seconds on-demand health check results are reused while the background loop isn't running
+HEALTH_CACHE_TTL = 2.0
+
+# Most tool calls from one parallel batch in flight against a single server
+MAX_PARALLEL_CALLS_PER_SERVER = 8
+
 
 class MCPClientManagerError(Exception):
     """Raised when MCP client manager operations fail"""
@@ -31,10 +68,112 @@ class MCPClientManager:
         self.config_manager = config_manager or MCPConfigManager()
         self.clients: Dict[str, MCPProtocolClient] = {}
         self.connected_servers: Set[str] = set()
-        self.available_tools: Dict[str, List[Dict[str, Any]]] = {}
+        self.available_tools = {}
         self._connection_lock = asyncio.Lock()
-        self._executor = ThreadPoolExecutor(max_workers=10)
+        # Read-only copies of clients/connected_servers for the tool call path;
+        # writers republish them under _connection_lock after changing connections
+        self._clients_snapshot: Mapping[str, MCPProtocolClient] = MappingProxyType({})
+        self._connected_snapshot: FrozenSet[str] = frozenset()
+        
+        # Client methods tried in order for health checks; a method the server
+        # doesn't support (NotImplementedError) falls through to the next one.
+        # The timeout covers the client's own ping retries.
+        self._health_check_methods: List[str] = ["health_check", "list_tools"]
+        self._health_check_timeout = 20.0
+        
+        # Latest health check results, refreshed in the background after initialize()
+        self.health_check_interval = HEALTH_CHECK_INTERVAL
+        self._health_cache: Dict[str, bool] = {}
+        self._health_task: Optional[asyncio.Task] = None
+        # Bursts of on-demand health checks within the TTL share one round of checks
+        self.health_cache_ttl = HEALTH_CACHE_TTL
+        self._health_checked_at: Optional[float] = None
+        
+        # Caps concurrent call_tools_parallel calls per server, created on first use
+        self._per_server_sem: Dict[str, asyncio.Semaphore] = {}
+        
+    @property
+    def available_tools(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Tool definitions per connected server"""
+        return self._available_tools
+    
+    @available_tools.setter
+    def available_tools(self, tools: Dict[str, List[Dict[str, Any]]]) -> None:
+        self._available_tools = tools
+        # Per-server slices of the tool views, built on first use
+        self._server_tool_views: Dict[str, ServerToolView] = {}
+        self._invalidate_tool_views()
+    
+    def _set_server_tools(self, server_name: str, tools: List[Dict[str, Any]]) -> None:
+        """Record a server's tools"""
+        self._available_tools[server_name] = tools
+        self._invalidate_tool_views(server_name)
+    
+    def _remove_server_tools(self, server_name: str) -> None:
+        """Forget a server's tools"""
+        if self._available_tools.pop(server_name, None) is not None:
+            self._invalidate_tool_views(server_name)
+    
+    def _invalidate_tool_views(self, server_name: Optional[str] = None) -> None:
+        """
+        Drop the cached tool views so they are rebuilt on next use
         
+        Only server_name's slice is rebuilt when given; the combined views are
+        always reassembled from the per-server slices.
+        """
+        if server_name is not None:
+            self._server_tool_views.pop(server_name, None)
+        self._flat_tools: Optional[List[Dict[str, Any]]] = None
+        self._name_index: Dict[str, List[Dict[str, Any]]] = {}
+        self._tool_search_index: List[ToolSearchEntry] = []
+    
+    def _get_server_tool_view(self, server_name: str) -> ServerToolView:
+        """One server's slice of the tool views, built once per change to its tools"""
+        view = self._server_tool_views.get(server_name)
+        if view is None:
+            flat_tools = []
+            search_entries = []
+            tool_defs = {}
+            for tool in self._available_tools.get(server_name, []):
+                tool_with_server = tool.copy()
+                tool_with_server['server_name'] = server_name
+                flat_tools.append(tool_with_server)
+                
+                name_lower = tool.get('name', '').lower()
+                name_tokens = frozenset(NAME_TOKEN_SPLIT_RE.split(name_lower)) | {name_lower}
+                search_entries.append((name_lower, name_tokens, tool.get('description', '').lower(), tool_with_server))
+                
+                input_schema = tool.get('inputSchema', {})
+                required_props = frozenset(input_schema.get('required', [])) if input_schema else frozenset()
+                schema_properties = input_schema.get('properties', {}) if input_schema else {}
+                needs_validation = bool(required_props or schema_properties)
+                tool_defs.setdefault(tool.get('name'), (input_schema, required_props, schema_properties, needs_validation))
+            tool_names = tuple(tool.get('name') for tool in flat_tools)
+            view = self._server_tool_views[server_name] = (flat_tools, search_entries, tool_defs, tool_names)
+        return view
+    
+    def _get_flat_tools(self) -> List[Dict[str, Any]]:
+        """Flat list of tools with server_name added, assembled from the per-server slices"""
+        if self._flat_tools is None:
+            flat_tools = []
+            name_index: Dict[str, List[Dict[str, Any]]] = {}
+            search_index = []
+            for server_name in self._available_tools:
+                server_flat_tools, search_entries, _, _ = self._get_server_tool_view(server_name)
+                flat_tools.extend(server_flat_tools)
+                search_index.extend(search_entries)
+                for tool in server_flat_tools:
+                    name_index.setdefault(tool.get('name'), []).append(tool)
+            self._flat_tools = flat_tools
+            self._name_index = name_index
+            self._tool_search_index = search_index
+        return self._flat_tools
+    
+    def _publish_connections(self) -> None:
+        """Refresh the snapshots read by tool calls after connections change"""
+        self._clients_snapshot = MappingProxyType(dict(self.clients))
+        self._connected_snapshot = frozenset(self.connected_servers)
+    
     async def initialize(self, config_file_path: Optional[str] = None) -> None:
         """
         Initialize the MCP client manager
@@ -52,6 +191,10 @@ class MCPClientManager:
             # Connect to enabled servers
             await self.connect_to_servers()
             
+            # Keep server health up to date off the request path
+            if self._health_task is None or self._health_task.done():
+                self._health_task = asyncio.create_task(self._health_loop())
+            
             logger.info(f"MCP Client Manager initialized with {len(self.connected_servers)} connected servers")
             
         except Exception as e:
@@ -74,9 +217,13 @@ class MCPClientManager:
                     self.clients[server_name] = client
                     connection_tasks.append(self._connect_single_server(server_name, client))
             
-            # Execute connections in parallel
-            if connection_tasks:
-                await asyncio.gather(*connection_tasks, return_exceptions=True)
+            # Execute connections in parallel. gather cancels the remaining
+            # connects if this is cancelled; the ones that finished are still published.
+            try:
+                if connection_tasks:
+                    await asyncio.gather(*connection_tasks, return_exceptions=True)
+            finally:
+                self._publish_connections()
     
     async def _connect_single_server(self, server_name: str, client: MCPProtocolClient) -> None:
         """Connect to a single MCP server"""
@@ -85,7 +232,7 @@ class MCPClientManager:
             if success:
                 self.connected_servers.add(server_name)
                 # Store available tools for this server
-                self.available_tools[server_name] = client.get_available_tools()
+                self._set_server_tools(server_name, client.get_available_tools())
                 logger.info(f"Connected to MCP server: {server_name}")
             else:
                 logger.warning(f"Failed to connect to MCP server: {server_name}")
@@ -105,8 +252,9 @@ class MCPClientManager:
                 await asyncio.gather(*disconnect_tasks, return_exceptions=True)
             
             self.connected_servers.clear()
-            self.available_tools.clear()
+            self.available_tools = {}
             self.clients.clear()
+            self._publish_connections()
             
             logger.info("Disconnected from all MCP servers")
     
@@ -124,48 +272,83 @@ class MCPClientManager:
             logger.warning(f"Server {server_name} not found in clients")
             return False
         
-        try:
-            client = self.clients[server_name]
-            
-            # Disconnect if currently connected
-            if server_name in self.connected_servers:
-                await client.disconnect()
-                self.connected_servers.discard(server_name)
-                self.available_tools.pop(server_name, None)
-            
-            # Attempt reconnection
-            success = await client.connect()
-            if success:
-                self.connected_servers.add(server_name)
-                self.available_tools[server_name] = client.get_available_tools()
-                logger.info(f"Reconnected to MCP server: {server_name}")
-                return True
-            else:
-                logger.warning(f"Failed to reconnect to MCP server: {server_name}")
-                return False
+        async with self._connection_lock:
+            try:
+                client = self.clients[server_name]
                 
-        except Exception as e:
-            logger.error(f"Error reconnecting to MCP server {server_name}: {str(e)}")
-            return False
+                # Disconnect if currently connected
+                if server_name in self.connected_servers:
+                    await client.disconnect()
+                    self.connected_servers.discard(server_name)
+                    self._remove_server_tools(server_name)
+                
+                # Attempt reconnection
+                success = await client.connect()
+                if success:
+                    self.connected_servers.add(server_name)
+                    self._set_server_tools(server_name, client.get_available_tools())
+                    logger.info(f"Reconnected to MCP server: {server_name}")
+                    return True
+                else:
+                    logger.warning(f"Failed to reconnect to MCP server: {server_name}")
+                    return False
+                
+            except Exception as e:
+                logger.error(f"Error reconnecting to MCP server {server_name}: {str(e)}")
+                return False
+            finally:
+                self._publish_connections()
     
     async def health_check_servers(self) -> Dict[str, bool]:
         """
-        Perform health check on all connected servers
+        Get the health of all connected servers
+        Returns the latest background results while the health loop is running,
+        otherwise (or before its first check completes) checks the servers now
+        unless they were checked within the last health_cache_ttl seconds
+        
+        Returns:
+            Dictionary mapping server names to health status
+        """
+        if self._health_task is not None and not self._health_task.done() and self._health_cache:
+            return dict(self._health_cache)
+        if self._health_checked_at is not None and time.monotonic() - self._health_checked_at < self.health_cache_ttl:
+            return dict(self._health_cache)
+        return await self._refresh_health()
+    
+    async def _health_loop(self) -> None:
+        """
+        Periodically health check all connected servers
+        Clients don't monitor themselves; this is the only periodic check, and
+        it takes failed servers out of the connection snapshots and tool views
+        """
+        while True:
+            try:
+                await self._refresh_health()
+            except Exception as e:
+                logger.error(f"Background health check failed: {str(e)}")
+            await asyncio.sleep(self.health_check_interval)
+    
+    async def _refresh_health(self) -> Dict[str, bool]:
+        """
+        Perform health check on all connected servers and cache the results
         
         Returns:
             Dictionary mapping server names to health status
         """
         health_results = {}
         
-        if not self.connected_servers:
-            return health_results
+        if not self._connected_snapshot:
+            self._health_cache = health_results
+            self._health_checked_at = time.monotonic()
+            return {}
         
         # Create health check tasks
         health_tasks = []
-        server_names = list(self.connected_servers)
+        server_names = list(self._connected_snapshot)
+        clients = self._clients_snapshot
         
         for server_name in server_names:
-            client = self.clients.get(server_name)
+            client = clients.get(server_name)
             if client:
                 health_tasks.append(self._health_check_single_server(server_name, client))
         
@@ -181,16 +364,32 @@ class MCPClientManager:
                 else:
                     health_results[server_name] = result
         
-        return health_results
+        self._health_cache = health_results
+        self._health_checked_at = time.monotonic()
+        return dict(health_results)
     
     async def _health_check_single_server(self, server_name: str, client: MCPProtocolClient) -> bool:
         """Perform health check on a single server"""
         try:
-            is_healthy = await client.health_check()
+            is_healthy = False
+            for method in self._health_check_methods:
+                try:
+                    result = await asyncio.wait_for(getattr(client, method)(), timeout=self._health_check_timeout)
+                except (AttributeError, NotImplementedError):
+                    continue
+                except asyncio.TimeoutError:
+                    logger.warning(f"Health check {method} timed out for {server_name}")
+                    break
+                # health_check returns a bool; other methods count as healthy when they succeed
+                is_healthy = result if isinstance(result, bool) else True
+                break
+            
             if not is_healthy:
                 # Remove from connected servers if unhealthy
-                self.connected_servers.discard(server_name)
-                self.available_tools.pop(server_name, None)
+                async with self._connection_lock:
+                    self.connected_servers.discard(server_name)
+                    self._remove_server_tools(server_name)
+                    self._publish_connections()
                 logger.warning(f"Server {server_name} failed health check")
             return is_healthy
         except Exception as e:
@@ -206,20 +405,31 @@ class MCPClientManager:
         """
         return self.available_tools.copy()
     
+    def get_tools_bulk(self, server_names: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the available tools of several servers in one call
+        
+        Args:
+            server_names: Names of the servers to get tools for
+            
+        Returns:
+            Dictionary mapping each requested server name to a new list of its
+            tools (empty for servers without tools)
+        """
+        available_tools = self._available_tools
+        return {server_name: list(available_tools.get(server_name, ())) for server_name in server_names}
+    
     def get_all_tools_flat(self) -> List[Dict[str, Any]]:
         """
         Get all available tools as a flat list with server information
         
+        The list is cached until the tool lists change and is shared between
+        callers, so it must not be modified
+        
         Returns:
             List of tool definitions with server_name added
         """
-        all_tools = []
-        for server_name, tools in self.available_tools.items():
-            for tool in tools:
-                tool_with_server = tool.copy()
-                tool_with_server['server_name'] = server_name
-                all_tools.append(tool_with_server)
-        return all_tools
+        return self._get_flat_tools()
     
     def find_tools_by_name(self, tool_name: str) -> List[Dict[str, Any]]:
         """
@@ -231,14 +441,8 @@ class MCPClientManager:
         Returns:
             List of matching tools with server information
         """
-        matching_tools = []
-        for server_name, tools in self.available_tools.items():
-            for tool in tools:
-                if tool.get('name') == tool_name:
-                    tool_with_server = tool.copy()
-                    tool_with_server['server_name'] = server_name
-                    matching_tools.append(tool_with_server)
-        return matching_tools
+        self._get_flat_tools()
+        return list(self._name_index.get(tool_name, []))
     
     def find_tools_by_description(self, keywords: List[str]) -> List[Dict[str, Any]]:
         """
@@ -250,31 +454,44 @@ class MCPClientManager:
         Returns:
             List of matching tools with server information and relevance score
         """
-        matching_tools = []
-        
-        for server_name, tools in self.available_tools.items():
-            for tool in tools:
-                description = tool.get('description', '').lower()
-                tool_name = tool.get('name', '').lower()
-                
-                # Calculate relevance score
-                score = 0
-                for keyword in keywords:
-                    keyword_lower = keyword.lower()
-                    if keyword_lower in tool_name:
-                        score += 3  # Higher weight for name matches
-                    if keyword_lower in description:
-                        score += 1
-                
-                if score > 0:
-                    tool_with_server = tool.copy()
-                    tool_with_server['server_name'] = server_name
-                    tool_with_server['relevance_score'] = score
-                    matching_tools.append(tool_with_server)
+        matches = self._score_tools(keywords)
         
         # Sort by relevance score (descending)
-        matching_tools.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
-        return matching_tools
+        matches.sort(key=itemgetter(0), reverse=True)
+        return [{**tool, 'relevance_score': score} for score, tool in matches]
+    
+    def _score_tools(self, keywords: List[str], max_tools: Optional[int] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        (relevance score, shared flat tool) for each tool matching any keyword, in tool order
+        
+        With max_tools, scanning stops once that many tools have the highest
+        possible score, since later tools can't outrank them.
+        """
+        self._get_flat_tools()
+        matches = []
+        # Repeated keywords are only scored once
+        keywords_lower = list(dict.fromkeys(keyword.lower() for keyword in keywords))
+        best_score = 4 * len(keywords_lower)
+        best_matches = 0
+        
+        for name_lower, name_tokens, description, tool in self._tool_search_index:
+            # Calculate relevance score
+            score = 0
+            for keyword_lower in keywords_lower:
+                # Whole words hit the token set; partial words fall back to a substring check
+                if keyword_lower in name_tokens or keyword_lower in name_lower:
+                    score += 3  # Higher weight for name matches
+                if keyword_lower in description:
+                    score += 1
+            
+            if score > 0:
+                matches.append((score, tool))
+                if score == best_score:
+                    best_matches += 1
+                    if best_matches == max_tools:
+                        break
+        
+        return matches
     
     async def call_tool(self, server_name: str, tool_name: str, parameters: Dict[str, Any]) -> MCPToolCall:
         """
@@ -288,37 +505,37 @@ class MCPClientManager:
         Returns:
             MCPToolCall with result or error
         """
-        if server_name not in self.connected_servers:
-            tool_call = MCPToolCall(
-                server_name=server_name,
-                tool_name=tool_name,
-                parameters=parameters
-            )
-            tool_call.mark_error(f"Server '{server_name}' is not connected")
-            return tool_call
+        error = self._check_tool_call(server_name, tool_name, parameters)
+        if error:
+            return self._make_error_call(server_name, tool_name, parameters, error)
         
-        client = self.clients.get(server_name)
-        if not client:
-            tool_call = MCPToolCall(
-                server_name=server_name,
-                tool_name=tool_name,
-                parameters=parameters
-            )
-            tool_call.mark_error(f"Client for server '{server_name}' not found")
-            return tool_call
+        return await self._clients_snapshot[server_name].call_tool(tool_name, parameters)
+    
+    def _check_tool_call(self, server_name: str, tool_name: str, parameters: Dict[str, Any]) -> Optional[str]:
+        """Return why a tool call can't be made, or None if it can"""
+        if server_name not in self._connected_snapshot:
+            return f"Server '{server_name}' is not connected"
+        
+        if not self._clients_snapshot.get(server_name):
+            return f"Client for server '{server_name}' not found"
         
         # Validate parameters if tool schema is available
         validation_error = self._validate_tool_parameters(server_name, tool_name, parameters)
         if validation_error:
-            tool_call = MCPToolCall(
-                server_name=server_name,
-                tool_name=tool_name,
-                parameters=parameters
-            )
-            tool_call.mark_error(f"Parameter validation failed: {validation_error}")
-            return tool_call
+            return f"Parameter validation failed: {validation_error}"
         
-        return await client.call_tool(tool_name, parameters)
+        return None
+    
+    @staticmethod
+    def _make_error_call(server_name: str, tool_name: str, parameters: Dict[str, Any], error: str) -> MCPToolCall:
+        """Create a tool call already marked as failed"""
+        tool_call = MCPToolCall(
+            server_name=server_name,
+            tool_name=tool_name,
+            parameters=parameters
+        )
+        tool_call.mark_error(error)
+        return tool_call
     
     async def call_tools_parallel(self, tool_calls: List[Dict[str, Any]]) -> List[MCPToolCall]:
         """
@@ -336,35 +553,44 @@ class MCPClientManager:
         if not tool_calls:
             return []
         
-        # Create tasks for parallel execution
+        # Calls that can't be made are answered up front; only the rest are scheduled
+        final_results: List[Optional[MCPToolCall]] = []
         tasks = []
         for call_spec in tool_calls:
             server_name = call_spec.get('server_name')
             tool_name = call_spec.get('tool_name')
             parameters = call_spec.get('parameters', {})
             
-            task = self.call_tool(server_name, tool_name, parameters)
-            tasks.append(task)
-        
-        # Execute all tool calls in parallel
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Convert exceptions to error tool calls
-        final_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                call_spec = tool_calls[i]
-                error_call = MCPToolCall(
-                    server_name=call_spec.get('server_name', 'unknown'),
-                    tool_name=call_spec.get('tool_name', 'unknown'),
-                    parameters=call_spec.get('parameters', {})
-                )
-                error_call.mark_error(f"Tool call failed: {str(result)}")
-                final_results.append(error_call)
+            error = self._check_tool_call(server_name, tool_name, parameters)
+            if error:
+                final_results.append(self._make_error_call(server_name, tool_name, parameters, error))
             else:
-                final_results.append(result)
-        
-        return final_results
+                final_results.append(None)
+                tasks.append(self._call_tool_bounded(server_name, tool_name, parameters))
+        
+        # Execute the remaining tool calls in parallel, a few at a time per server.
+        # A lone call is awaited directly rather than through a task and gather.
+        if len(tasks) == 1:
+            results = [await tasks[0]]
+        elif tasks:
+            results = await asyncio.gather(*tasks)
+        else:
+            return final_results
+        
+        # gather keeps input order, so the results fill the scheduled slots in turn
+        scheduled_results = iter(results)
+        return [result if result is not None else next(scheduled_results) for result in final_results]
+    
+    async def _call_tool_bounded(self, server_name: str, tool_name: str, parameters: Dict[str, Any]) -> MCPToolCall:
+        """Call a tool while holding one of its server's parallel call slots, returning failures as error calls"""
+        semaphore = self._per_server_sem.get(server_name)
+        if semaphore is None:
+            semaphore = self._per_server_sem[server_name] = asyncio.Semaphore(MAX_PARALLEL_CALLS_PER_SERVER)
+        async with semaphore:
+            try:
+                return await self.call_tool(server_name, tool_name, parameters)
+            except Exception as e:
+                return self._make_error_call(server_name, tool_name, parameters, f"Tool call failed: {str(e)}")
     
     def _validate_tool_parameters(self, server_name: str, tool_name: str, parameters: Dict[str, Any]) -> Optional[str]:
         """
@@ -378,31 +604,22 @@ class MCPClientManager:
         Returns:
             Error message if validation fails, None if valid
         """
-        server_tools = self.available_tools.get(server_name, [])
-        
         # Find the tool definition
         tool_def = None
-        for tool in server_tools:
-            if tool.get('name') == tool_name:
-                tool_def = tool
-                break
-        
+        if server_name in self._available_tools:
+            tool_def = self._get_server_tool_view(server_name)[2].get(tool_name)
         if not tool_def:
             return f"Tool '{tool_name}' not found on server '{server_name}'"
         
-        # Get input schema
-        input_schema = tool_def.get('inputSchema', {})
-        if not input_schema:
-            return None  # No schema to validate against
-        
-        # Basic validation - check required properties
-        schema_properties = input_schema.get('properties', {})
-        required_props = input_schema.get('required', [])
+        input_schema, required_props, schema_properties, needs_validation = tool_def
+        if not needs_validation:
+            return None  # No required or typed parameters to check
         
-        # Check required parameters
-        for required_prop in required_props:
-            if required_prop not in parameters:
-                return f"Required parameter '{required_prop}' is missing"
+        # Check required parameters, reporting the first missing one in schema order
+        if not required_props <= parameters.keys():
+            for required_prop in input_schema.get('required', []):
+                if required_prop not in parameters:
+                    return f"Required parameter '{required_prop}' is missing"
         
         # Check parameter types (basic validation)
         for param_name, param_value in parameters.items():
@@ -415,20 +632,16 @@ class MCPClientManager:
     
     def _validate_parameter_type(self, value: Any, expected_type: str) -> bool:
         """Validate parameter type against JSON schema type"""
-        type_mapping = {
-            'string': str,
-            'number': (int, float),
-            'integer': int,
-            'boolean': bool,
-            'array': list,
-            'object': dict
-        }
-        
-        expected_python_type = type_mapping.get(expected_type)
+        if expected_type == 'integer':
+            return type(value) is int
+        if expected_type == 'boolean':
+            return type(value) is bool
+        
+        expected_python_type = PARAMETER_TYPES.get(expected_type)
         if expected_python_type is None:
             return True  # Unknown type, skip validation
         
-        return isinstance(value, expected_python_type)
+        return isinstance(value, expected_python_type) and type(value) is not bool
     
     def select_tools_for_query(self, query: str, max_tools: int = 5) -> List[Dict[str, Any]]:
         """
@@ -441,17 +654,16 @@ class MCPClientManager:
         Returns:
             List of relevant tools with server information
         """
-        # Extract keywords from query (simple approach)
-        keywords = [word.lower().strip() for word in query.split() if len(word.strip()) > 2]
+        # Extract keywords from query, each scored once even if repeated
+        keywords = list(dict.fromkeys(QUERY_KEYWORD_RE.findall(query.lower())))
         
         if not keywords:
             return []
         
-        # Find tools by description keywords
-        relevant_tools = self.find_tools_by_description(keywords)
-        
-        # Return top tools up to max_tools limit
-        return relevant_tools[:max_tools]
+        # Find tools by description keywords and keep the top max_tools without sorting
+        # them all; only those are copied out with their scores
+        matches = heapq.nlargest(max_tools, self._score_tools(keywords, max_tools), key=itemgetter(0))
+        return [{**tool, 'relevance_score': score} for score, tool in matches]
     
     def get_server_status(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -464,14 +676,15 @@ class MCPClientManager:
         
         for server_name, server_config in self.config_manager.get_all_servers().items():
             is_connected = server_name in self.connected_servers
-            tool_count = len(self.available_tools.get(server_name, []))
+            # Tool names are cached per server alongside the other tool views
+            tool_names = self._get_server_tool_view(server_name)[3] if server_name in self._available_tools else ()
             
             status[server_name] = {
                 'enabled': server_config.enabled,
                 'connected': is_connected,
                 'endpoint': server_config.endpoint,
-                'tool_count': tool_count,
-                'tools': [tool.get('name') for tool in self.available_tools.get(server_name, [])]
+                'tool_count': len(tool_names),
+                'tools': list(tool_names)
             }
         
         return status
@@ -486,16 +699,18 @@ class MCPClientManager:
         Returns:
             True if refresh successful, False otherwise
         """
-        if server_name not in self.connected_servers:
+        if server_name not in self._connected_snapshot:
             return False
         
-        client = self.clients.get(server_name)
+        client = self._clients_snapshot.get(server_name)
         if not client:
             return False
         
         try:
             tools = await client.list_tools()
-            self.available_tools[server_name] = tools
+            if server_name not in self._connected_snapshot:
+                return False  # Disconnected while listing; don't bring its tools back
+            self._set_server_tools(server_name, tools)
             logger.info(f"Refreshed tools for server {server_name}: {len(tools)} tools")
             return True
         except Exception as e:
@@ -504,8 +719,10 @@ class MCPClientManager:
     
     async def shutdown(self) -> None:
         """Shutdown the MCP client manager"""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
         await self.disconnect_from_servers()
-        self._executor.shutdown(wait=True)
         logger.info("MCP Client Manager shutdown complete")
     
     def __str__(self) -> str:
@@ -3,16 +3,25 @@ MCP Server Configuration Manager
 Handles loading, validation, and management of MCP server configurations
 """
 
-import json
 import logging
+import os
+import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from pydantic import ValidationError
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Any, Tuple
+import orjson
+from pydantic import TypeAdapter, ValidationError
 
 from models.mcp import MCPServerConfig
 
 logger = logging.getLogger(__name__)
 
+# Validates and dumps a whole 'servers' list in one pydantic-core call
+SERVER_CONFIGS_ADAPTER = TypeAdapter(List[MCPServerConfig])
+
+# orjson options for the config file: human-readable, any dict keys allowed
+CONFIG_DUMP_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
 
 class MCPConfigurationError(Exception):
     """Raised when MCP configuration is invalid or cannot be loaded"""
@@ -27,15 +36,49 @@ class MCPConfigManager:
     
     def __init__(self, config_file_path: Optional[str] = None):
         self.config_file_path = config_file_path or "mcp_config.json"
-        self.servers: Dict[str, MCPServerConfig] = {}
+        self.servers = {}
         self._config_data: Dict[str, Any] = {}
-        
-    def load_configuration(self, config_file_path: Optional[str] = None) -> None:
+        # Top-level config entries other than 'servers', written back on save/export
+        self._extra_config: Dict[str, Any] = {}
+        # (device, inode, mtime, size) of the last file written by save_configuration
+        self._last_saved_signature: Optional[Tuple[int, int, int, int]] = None
+        # Signature of the file the current servers match, while they are unchanged
+        self._loaded_signature: Optional[Tuple[int, int, int, int]] = None
+        
+    @property
+    def servers(self) -> Dict[str, MCPServerConfig]:
+        """Server configurations by name"""
+        return self._servers
+    
+    @servers.setter
+    def servers(self, servers: Dict[str, MCPServerConfig]) -> None:
+        self._servers = servers
+        # Live read-only view handed out by get_all_servers
+        self._servers_view: Mapping[str, MCPServerConfig] = MappingProxyType(servers)
+        self._servers_changed()
+    
+    def _servers_changed(self) -> None:
+        """Drop state derived from the servers so it is rebuilt on next use"""
+        self._enabled_servers: Optional[Dict[str, MCPServerConfig]] = None
+        # In-memory edits mean the servers no longer match the file they came from
+        self._loaded_signature = None
+    
+    def _get_enabled_servers(self) -> Dict[str, MCPServerConfig]:
+        """Enabled server configurations, built once per change to the servers"""
+        if self._enabled_servers is None:
+            self._enabled_servers = {
+                name: config for name, config in self._servers.items()
+                if config.enabled
+            }
+        return self._enabled_servers
+    
+    def load_configuration(self, config_file_path: Optional[str] = None, force: bool = False) -> None:
         """
         Load MCP server configurations from JSON file
         
         Args:
             config_file_path: Optional path to config file, uses default if not provided
+            force: Reparse the file even if it is unchanged since the last load
             
         Raises:
             MCPConfigurationError: If configuration file cannot be loaded or is invalid
@@ -45,45 +88,82 @@ class MCPConfigManager:
         try:
             config_path = Path(file_path)
             
-            if not config_path.exists():
-                logger.warning(f"MCP config file not found: {file_path}. Using empty configuration.")
+            try:
+                config_file = open(config_path, 'rb', buffering=0)
+            except FileNotFoundError:
+                logger.warning("MCP config file not found: %s. Using empty configuration.", file_path)
                 self._config_data = {"servers": []}
+                self._extra_config = {}
                 self.servers = {}
                 return
             
-            with open(config_path, 'r', encoding='utf-8') as f:
-                self._config_data = json.load(f)
+            # One open, one fstat and a read sized from it
+            with config_file:
+                signature = self._file_signature(os.fstat(config_file.fileno()))
+                if not force and signature == self._loaded_signature:
+                    logger.debug("MCP config file unchanged since last load: %s", file_path)
+                    return
+                raw_config = config_file.read()
+            
+            # A file still exactly as save_configuration wrote it holds our own
+            # validated output, so it doesn't need validating again
+            trusted = signature == self._last_saved_signature
+            
+            self._config_data = orjson.loads(raw_config)
             
-            self._validate_and_load_servers()
-            logger.info(f"Loaded {len(self.servers)} MCP server configurations from {file_path}")
+            self._validate_and_load_servers(trusted=trusted)
+            self._loaded_signature = signature
+            logger.info("Loaded %d MCP server configurations from %s", len(self.servers), file_path)
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise MCPConfigurationError(f"Invalid JSON in config file {file_path}: {str(e)}")
         except Exception as e:
             raise MCPConfigurationError(f"Failed to load config file {file_path}: {str(e)}")
     
-    def _validate_and_load_servers(self) -> None:
-        """Validate and load server configurations from config data"""
+    @staticmethod
+    def _file_signature(stat: os.stat_result) -> Tuple[int, int, int, int]:
+        """Identify a config file's current contents by file identity, modification time and size"""
+        return stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _validate_and_load_servers(self, trusted: bool = False) -> None:
+        """
+        Validate and load server configurations from config data
+        
+        Args:
+            trusted: Build the configs with model_construct, skipping validation.
+                     Only for data this manager produced itself (model_dump output);
+                     unvalidated input would be stored as-is.
+        """
         servers_data = self._config_data.get("servers", [])
+        self._extra_config = {key: value for key, value in self._config_data.items() if key != "servers"}
         
         if not isinstance(servers_data, list):
             raise MCPConfigurationError("'servers' must be a list in configuration file")
         
-        self.servers = {}
-        
-        for i, server_data in enumerate(servers_data):
+        if trusted:
+            try:
+                server_configs = [MCPServerConfig.model_construct(**data) for data in servers_data]
+            except TypeError as e:
+                raise MCPConfigurationError(f"Error processing server configurations: {str(e)}")
+        else:
+            # pydantic-core validates every entry in one pass and reports each
+            # error with its index, so there is no per-entry try/except here
             try:
-                server_config = MCPServerConfig(**server_data)
-                
-                if server_config.name in self.servers:
-                    raise MCPConfigurationError(f"Duplicate server name: {server_config.name}")
-                
-                self.servers[server_config.name] = server_config
-                
+                server_configs = SERVER_CONFIGS_ADAPTER.validate_python(servers_data)
             except ValidationError as e:
-                raise MCPConfigurationError(f"Invalid server configuration at index {i}: {str(e)}")
-            except Exception as e:
-                raise MCPConfigurationError(f"Error processing server configuration at index {i}: {str(e)}")
+                index = e.errors()[0]['loc'][0]
+                raise MCPConfigurationError(f"Invalid server configuration at index {index}: {str(e)}")
+        
+        # Entries are already validated (or trusted); only names still need checking
+        servers: Dict[str, MCPServerConfig] = {}
+        for i, server_config in enumerate(server_configs):
+            # Names are interned since the same keys come back on every reload;
+            # setdefault checks and inserts with a single lookup
+            name = sys.intern(server_config.name)
+            if servers.setdefault(name, server_config) is not server_config:
+                raise MCPConfigurationError(f"Duplicate server name at index {i}: {name}")
+        
+        self.servers = servers
     
     def save_configuration(self, config_file_path: Optional[str] = None) -> None:
         """
@@ -98,29 +178,16 @@ class MCPConfigManager:
         file_path = config_file_path or self.config_file_path
         
         try:
-            # Convert server configs to dict format
-            servers_data = []
-            for server in self.servers.values():
-                server_dict = server.model_dump()
-                servers_data.append(server_dict)
-            
-            config_data = {
-                "servers": servers_data
-            }
-            
-            # Preserve any additional configuration data
-            if self._config_data:
-                for key, value in self._config_data.items():
-                    if key != "servers":
-                        config_data[key] = value
+            config_data = self.export_configuration()
             
             config_path = Path(file_path)
             config_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
+            config_path.write_bytes(orjson.dumps(config_data, option=CONFIG_DUMP_OPTIONS))
+            self._last_saved_signature = self._file_signature(config_path.stat())
+            self._loaded_signature = self._last_saved_signature
             
-            logger.info(f"Saved {len(self.servers)} MCP server configurations to {file_path}")
+            logger.info("Saved %d MCP server configurations to %s", len(self.servers), file_path)
             
         except Exception as e:
             raise MCPConfigurationError(f"Failed to save config file {file_path}: {str(e)}")
@@ -138,8 +205,9 @@ class MCPConfigManager:
         if server_config.name in self.servers:
             raise MCPConfigurationError(f"Server with name '{server_config.name}' already exists")
         
-        self.servers[server_config.name] = server_config
-        logger.info(f"Added MCP server configuration: {server_config.name}")
+        self.servers[sys.intern(server_config.name)] = server_config
+        self._servers_changed()
+        logger.info("Added MCP server configuration: %s", server_config.name)
     
     def update_server(self, server_name: str, server_config: MCPServerConfig) -> None:
         """
@@ -159,7 +227,8 @@ class MCPConfigManager:
             raise MCPConfigurationError("Server name cannot be changed during update")
         
         self.servers[server_name] = server_config
-        logger.info(f"Updated MCP server configuration: {server_name}")
+        self._servers_changed()
+        logger.info("Updated MCP server configuration: %s", server_name)
     
     def remove_server(self, server_name: str) -> None:
         """
@@ -171,11 +240,11 @@ class MCPConfigManager:
         Raises:
             MCPConfigurationError: If server doesn't exist
         """
-        if server_name not in self.servers:
+        if self.servers.pop(server_name, None) is None:
             raise MCPConfigurationError(f"Server '{server_name}' not found")
         
-        del self.servers[server_name]
-        logger.info(f"Removed MCP server configuration: {server_name}")
+        self._servers_changed()
+        logger.info("Removed MCP server configuration: %s", server_name)
     
     def get_server(self, server_name: str) -> Optional[MCPServerConfig]:
         """
@@ -189,14 +258,20 @@ class MCPConfigManager:
         """
         return self.servers.get(server_name)
     
-    def get_all_servers(self) -> Dict[str, MCPServerConfig]:
+    def get_all_servers(self, copy: bool = False) -> Mapping[str, MCPServerConfig]:
         """
         Get all server configurations
         
+        Args:
+            copy: Return a separate dictionary the caller may modify
+            
         Returns:
-            Dictionary of server name to configuration mappings
+            Read-only view of server name to configuration mappings that
+            reflects later changes, or a dictionary copy if requested
         """
-        return self.servers.copy()
+        if copy:
+            return self.servers.copy()
+        return self._servers_view
     
     def get_enabled_servers(self) -> Dict[str, MCPServerConfig]:
         """
@@ -205,10 +280,7 @@ class MCPConfigManager:
         Returns:
             Dictionary of enabled server configurations
         """
-        return {
-            name: config for name, config in self.servers.items()
-            if config.enabled
-        }
+        return self._get_enabled_servers().copy()
     
     def enable_server(self, server_name: str) -> None:
         """
@@ -220,11 +292,15 @@ class MCPConfigManager:
         Raises:
             MCPConfigurationError: If server doesn't exist
         """
-        if server_name not in self.servers:
+        server_config = self.servers.get(server_name)
+        if server_config is None:
             raise MCPConfigurationError(f"Server '{server_name}' not found")
         
-        self.servers[server_name].enabled = True
-        logger.info(f"Enabled MCP server: {server_name}")
+        # Leave derived state alone when the server is already enabled
+        if not server_config.enabled:
+            server_config.enabled = True
+            self._servers_changed()
+        logger.info("Enabled MCP server: %s", server_name)
     
     def disable_server(self, server_name: str) -> None:
         """
@@ -236,11 +312,15 @@ class MCPConfigManager:
         Raises:
             MCPConfigurationError: If server doesn't exist
         """
-        if server_name not in self.servers:
+        server_config = self.servers.get(server_name)
+        if server_config is None:
             raise MCPConfigurationError(f"Server '{server_name}' not found")
         
-        self.servers[server_name].enabled = False
-        logger.info(f"Disabled MCP server: {server_name}")
+        # Leave derived state alone when the server is already disabled
+        if server_config.enabled:
+            server_config.enabled = False
+            self._servers_changed()
+        logger.info("Disabled MCP server: %s", server_name)
     
     def validate_server_config(self, server_data: Dict[str, Any]) -> MCPServerConfig:
         """
@@ -260,15 +340,18 @@ class MCPConfigManager:
         except ValidationError as e:
             raise MCPConfigurationError(f"Invalid server configuration: {str(e)}")
     
-    def reload_configuration(self) -> None:
+    def reload_configuration(self, force: bool = False) -> None:
         """
         Reload configuration from file
         
+        Args:
+            force: Reparse the file even if it is unchanged since the last load
+            
         Raises:
             MCPConfigurationError: If configuration cannot be reloaded
         """
         logger.info("Reloading MCP server configuration")
-        self.load_configuration()
+        self.load_configuration(force=force)
     
     def get_server_count(self) -> int:
         """Get total number of configured servers"""
@@ -276,7 +359,7 @@ class MCPConfigManager:
     
     def get_enabled_server_count(self) -> int:
         """Get number of enabled servers"""
-        return len(self.get_enabled_servers())
+        return len(self._get_enabled_servers())
     
     def has_server(self, server_name: str) -> bool:
         """Check if a server configuration exists"""
@@ -288,7 +371,7 @@ class MCPConfigManager:
     
     def get_enabled_server_names(self) -> List[str]:
         """Get list of enabled server names"""
-        return [name for name, config in self.servers.items() if config.enabled]
+        return list(self._get_enabled_servers())
     
     def create_server_from_dict(self, server_data: Dict[str, Any]) -> MCPServerConfig:
         """
@@ -312,26 +395,19 @@ class MCPConfigManager:
         Returns:
             Configuration dictionary suitable for JSON serialization
         """
-        servers_data = []
-        for server in self.servers.values():
-            servers_data.append(server.model_dump())
-        
-        config_data = {"servers": servers_data}
+        # Dump every server in one pydantic-core call rather than one model_dump each
+        servers_data = SERVER_CONFIGS_ADAPTER.dump_python(list(self.servers.values()))
         
         # Include any additional configuration data
-        if self._config_data:
-            for key, value in self._config_data.items():
-                if key != "servers":
-                    config_data[key] = value
-        
-        return config_data
+        return {"servers": servers_data, **self._extra_config}
     
-    def import_configuration(self, config_data: Dict[str, Any]) -> None:
+    def import_configuration(self, config_data: Dict[str, Any], trusted: bool = False) -> None:
         """
         Import configuration from dictionary
         
         Args:
             config_data: Configuration dictionary
+            trusted: Skip server validation; only for export_configuration() output
             
         Raises:
             MCPConfigurationError: If configuration is invalid
@@ -342,9 +418,9 @@ class MCPConfigManager:
         
         # Store the config data and validate servers
         self._config_data = config_data
-        self._validate_and_load_servers()
+        self._validate_and_load_servers(trusted=trusted)
         
-        logger.info(f"Imported {len(self.servers)} MCP server configurations")
+        logger.info("Imported %d MCP server configurations", len(self.servers))
     
     def __str__(self) -> str:
         enabled_count = self.get_enabled_server_count()
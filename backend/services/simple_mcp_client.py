@@ -4,23 +4,83 @@ Uses Docker-based MCP server with stdio transport
 """
 
 import asyncio
-import json
+import itertools
 import logging
+import re
 import subprocess
 import os
-from typing import Dict, List, Any, Optional
+import sys
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+import orjson
 from config import settings
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Words that mark a query as Grafana related (matched anywhere, case-insensitively)
+GRAFANA_KEYWORDS = (
+    'grafana', 'dashboard', 'metric', 'datasource',
+    'prometheus', 'alert', 'panel', 'visualization'
+)
+
+# Query words that suggest each tool, in the order tools are offered
+TOOL_KEYWORDS = {
+    'search_dashboards': ('dashboard', 'list', 'show', 'search', 'find'),
+    'list_datasources': ('datasource', 'data source'),
+    'query_prometheus': ('metric', 'query', 'prometheus'),
+    'query_loki_logs': ('logs', 'loki'),
+    'list_alert_rules': ('alert',),
+    'list_incidents': ('incident',),
+}
+
+KEYWORD_TOOLS = {keyword: tool for tool, keywords in TOOL_KEYWORDS.items() for keyword in keywords}
+
+
+def _keyword_pattern(keywords) -> re.Pattern:
+    """One regex matching any of the keywords, longest first"""
+    # Queries are lowercased before matching, so the pattern needs no IGNORECASE
+    return re.compile('|'.join(map(re.escape, sorted(keywords, key=len, reverse=True))))
+
+
+GRAFANA_KEYWORD_RE = _keyword_pattern(GRAFANA_KEYWORDS)
+TOOL_KEYWORD_RE = _keyword_pattern(KEYWORD_TOOLS)
+
+# Distinct normalized queries whose relevant tools are remembered
+QUERY_TOOLS_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=QUERY_TOOLS_CACHE_SIZE)
+def _classify_query(query: str) -> Tuple[str, ...]:
+    """Tools relevant to a normalized query, or () if it isn't about Grafana"""
+    if GRAFANA_KEYWORD_RE.search(query) is None:
+        return ()
+    
+    # One pass over the query finds every keyword; each tool is listed once
+    matched_tools = {KEYWORD_TOOLS[match.group()] for match in TOOL_KEYWORD_RE.finditer(query)}
+    relevant_tools = tuple(tool for tool in TOOL_KEYWORDS if tool in matched_tools)
+    
+    # If no specific tools matched but it's a Grafana query, default to dashboards
+    return relevant_tools or ('search_dashboards',)
+
+# Running container with the Grafana MCP server, and the server command inside it
+GRAFANA_CONTAINER = "jolly_cori"
+GRAFANA_MCP_COMMAND = ('docker', 'exec', '-i', GRAFANA_CONTAINER, '/app/mcp-grafana')
+
+# Fixed JSON-RPC envelope around a tools/call request's params, one request per line
+TOOL_CALL_REQUEST_PREFIX = b'{"jsonrpc":"2.0","id":%d,"method":"tools/call","params":'
+TOOL_CALL_REQUEST_SUFFIX = b'}\n'
+
+# Slotted dataclasses need Python 3.10+; older interpreters get a regular one
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(frozen=True, **_DATACLASS_OPTIONS)
 class MCPToolResult:
-    """Result from MCP tool execution"""
+    """Result from MCP tool execution (immutable)"""
     tool_name: str
     success: bool
     result: Any = None
-    error: str = None
+    error: Optional[str] = None
 
 class SimpleMCPClient:
     """
@@ -39,50 +99,25 @@ class SimpleMCPClient:
             "get_dashboard_by_uid",
             "list_incidents"
         ]
+        
+        # One long-lived stdio session to the MCP server, shared by all tool calls;
+        # responses are matched to their requests by JSON-RPC id
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = itertools.count(1).__next__
+        # Created on first use so they belong to the running event loop
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._call_semaphore: Optional[asyncio.Semaphore] = None
     
     async def is_grafana_query(self, query: str) -> bool:
         """Check if query is related to Grafana"""
-        grafana_keywords = [
-            'grafana', 'dashboard', 'metric', 'datasource', 
-            'prometheus', 'alert', 'panel', 'visualization'
-        ]
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in grafana_keywords)
+        return bool(_classify_query(query.lower().strip()))
     
     async def get_relevant_tools(self, query: str) -> List[str]:
         """Get tools relevant to the query"""
-        if not await self.is_grafana_query(query):
-            return []
-        
-        query_lower = query.lower()
-        relevant_tools = []
-        
-        if any(word in query_lower for word in ['dashboard', 'list', 'show']):
-            relevant_tools.append('search_dashboards')
-        
-        if any(word in query_lower for word in ['datasource', 'data source']):
-            relevant_tools.append('list_datasources')
-        
-        if any(word in query_lower for word in ['search', 'find']):
-            relevant_tools.append('search_dashboards')
-        
-        if any(word in query_lower for word in ['metric', 'query', 'prometheus']):
-            relevant_tools.append('query_prometheus')
-        
-        if any(word in query_lower for word in ['logs', 'loki']):
-            relevant_tools.append('query_loki_logs')
-        
-        if any(word in query_lower for word in ['alert', 'alerts']):
-            relevant_tools.append('list_alert_rules')
-        
-        if any(word in query_lower for word in ['incident', 'incidents']):
-            relevant_tools.append('list_incidents')
-        
-        # If no specific tools matched but it's a Grafana query, default to dashboards
-        if not relevant_tools:
-            relevant_tools.append('search_dashboards')
-        
-        return relevant_tools
+        return list(_classify_query(query.lower().strip()))
     
     async def call_tool(self, tool_name: str, parameters: Dict[str, Any] = None) -> MCPToolResult:
         """
@@ -95,81 +130,57 @@ class SimpleMCPClient:
                 error=f"Tool {tool_name} not available"
             )
         
+        # Only a few calls run against Grafana at once; the rest wait their turn
+        if self._call_semaphore is None:
+            self._call_semaphore = asyncio.Semaphore(max(1, settings.mcp_max_concurrency))
+        async with self._call_semaphore:
+            return await self._send_tool_call(tool_name, parameters)
+    
+    async def _send_tool_call(self, tool_name: str, parameters: Optional[Dict[str, Any]]) -> MCPToolResult:
+        """Send one tools/call request over the session and wait for its result"""
+        request_id = self._next_id()
         try:
-            # Prepare the MCP request
-            mcp_request = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": parameters or {}
-                }
-            }
-            
-            # Set up environment variables
-            env = os.environ.copy()
-            env.update({
-                'GRAFANA_URL': self.grafana_url,
-                'GRAFANA_API_KEY': self.grafana_api_key
-            })
-            
-            # Use docker exec with the running container instead of docker run
-            container_name = "jolly_cori"  # Use the running container
-            
-            # Create the process to execute the command in the running container
-            process = await asyncio.create_subprocess_exec(
-                'docker', 'exec', '-i', container_name, '/app/mcp-grafana',
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            # Prepare the MCP request; only the params need encoding
+            request_bytes = (
+                TOOL_CALL_REQUEST_PREFIX % request_id
+                + orjson.dumps({"name": tool_name, "arguments": parameters or {}})
+                + TOOL_CALL_REQUEST_SUFFIX
             )
             
-            # Send the request
-            request_json = json.dumps(mcp_request) + '\n'
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(input=request_json.encode()),
-                timeout=settings.mcp_client_timeout
-            )
+            process = await self._ensure_started()
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
             
-            if process.returncode != 0:
-                logger.error(f"MCP process failed: {stderr.decode()}")
+            # Send the request over the shared session and wait for its response
+            try:
+                process.stdin.write(request_bytes)
+                await process.stdin.drain()
+                response = await asyncio.wait_for(future, timeout=settings.mcp_client_timeout)
+            except (BrokenPipeError, ConnectionResetError) as e:
+                # The server went away; start a fresh one on the next call
+                logger.error("MCP session lost while calling %s: %s", tool_name, e)
+                await self.close()
                 return MCPToolResult(
                     tool_name=tool_name,
                     success=False,
-                    error=f"Process failed: {stderr.decode()}"
+                    error=f"MCP session lost: {e}"
                 )
+            finally:
+                self._pending.pop(request_id, None)
             
-            # Parse the response
-            response_text = stdout.decode().strip()
-            if not response_text:
+            if 'result' in response:
+                return MCPToolResult(
+                    tool_name=tool_name,
+                    success=True,
+                    result=response['result']
+                )
+            elif 'error' in response:
                 return MCPToolResult(
                     tool_name=tool_name,
                     success=False,
-                    error="No response from MCP server"
+                    error=response['error'].get('message', 'Unknown error')
                 )
             
-            # Handle multiple JSON responses (common with MCP)
-            lines = response_text.split('\n')
-            for line in lines:
-                if line.strip():
-                    try:
-                        response = json.loads(line)
-                        if 'result' in response:
-                            return MCPToolResult(
-                                tool_name=tool_name,
-                                success=True,
-                                result=response['result']
-                            )
-                        elif 'error' in response:
-                            return MCPToolResult(
-                                tool_name=tool_name,
-                                success=False,
-                                error=response['error'].get('message', 'Unknown error')
-                            )
-                    except json.JSONDecodeError:
-                        continue
-            
             return MCPToolResult(
                 tool_name=tool_name,
                 success=False,
@@ -177,24 +188,112 @@ class SimpleMCPClient:
             )
             
         except asyncio.TimeoutError:
-            logger.error(f"MCP tool call timed out after {settings.mcp_client_timeout} seconds: {tool_name}")
+            logger.error("MCP tool call timed out after %s seconds: %s", settings.mcp_client_timeout, tool_name)
             return MCPToolResult(
                 tool_name=tool_name,
                 success=False,
                 error=f"MCP tool call timed out after {settings.mcp_client_timeout} seconds. The Grafana server may be slow to respond."
             )
         except Exception as e:
-            logger.error(f"Error calling MCP tool {tool_name}: {e}")
+            logger.error("Error calling MCP tool %s: %s", tool_name, e)
             return MCPToolResult(
                 tool_name=tool_name,
                 success=False,
                 error=str(e)
             )
     
+    async def _ensure_started(self) -> asyncio.subprocess.Process:
+        """Start the MCP server session unless one is already running"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._process is None or self._process.returncode is not None:
+                self._process = await asyncio.create_subprocess_exec(
+                    *GRAFANA_MCP_COMMAND,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                self._reader_task = asyncio.create_task(self._read_responses(self._process))
+                self._stderr_task = asyncio.create_task(self._log_stderr(self._process))
+                logger.info("Started Grafana MCP session")
+            return self._process
+    
+    async def _read_responses(self, process: asyncio.subprocess.Process) -> None:
+        """Resolve pending tool calls with the responses the server writes, one JSON message per line"""
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                # Parse the raw bytes; lines that aren't JSON (e.g. stray logging) are skipped
+                try:
+                    response = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+                future = self._pending.get(response.get('id')) if isinstance(response, dict) else None
+                if future and not future.done():
+                    future.set_result(response)
+        finally:
+            # The session is over; fail whatever is still waiting on it, unless
+            # those calls already went to a newer session
+            if self._process is process or self._process is None:
+                for future in list(self._pending.values()):
+                    if not future.done():
+                        future.set_exception(ConnectionResetError("MCP server closed the session"))
+    
+    async def _log_stderr(self, process: asyncio.subprocess.Process) -> None:
+        """Drain the server's stderr so it never blocks on a full pipe"""
+        while True:
+            line = await process.stderr.readline()
+            if not line:
+                break
+            # Server chatter is only decoded when debug logging is on
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("mcp-grafana: %s", line.decode(errors='replace').rstrip())
+    
+    async def close(self) -> None:
+        """Stop the MCP server session, if one is running"""
+        process, self._process = self._process, None
+        for task in (self._reader_task, self._stderr_task):
+            if task:
+                task.cancel()
+        self._reader_task = self._stderr_task = None
+        
+        if process is None or process.returncode is not None:
+            return
+        try:
+            process.stdin.close()
+            await asyncio.wait_for(process.wait(), timeout=5)
+        except Exception:
+            process.kill()
+            await process.wait()
+    
     async def call_multiple_tools(self, tool_names: List[str]) -> List[MCPToolResult]:
-        """Call multiple tools in parallel"""
+        """Call multiple tools in parallel, up to settings.mcp_max_concurrency at a time"""
         tasks = [self.call_tool(tool_name) for tool_name in tool_names]
-        return await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Formatters expect MCPToolResult entries, so unexpected exceptions become failures
+        return [
+            MCPToolResult(tool_name=tool_name, success=False, error=str(result))
+            if isinstance(result, Exception) else result
+            for tool_name, result in zip(tool_names, results)
+        ]
+    
+    async def select_and_call(self, query: str) -> Tuple[List[str], List[MCPToolResult]]:
+        """
+        Select the tools relevant to the query and call them in one step
+        
+        Returns:
+            Tuple of (selected tool names, tool results)
+        """
+        # Several keywords map to the same tool, so only call each one once
+        tool_names = list(dict.fromkeys(await self.get_relevant_tools(query)))
+        if not tool_names:
+            return [], []
+        
+        return tool_names, await self.call_multiple_tools(tool_names)
     
     def format_tool_results(self, results: List[MCPToolResult]) -> str:
         """Format tool results for inclusion in AI context"""
@@ -4,75 +4,137 @@ Simple MCP test without complex dependencies
 """
 
 import asyncio
-import json
+import functools
 import subprocess
 import os
 import sys
 
-async def test_mcp_grafana():
-    print("🔍 Testing MCP Grafana Integration")
-    print("=" * 50)
-    
-    # Test 1: Check if Docker image exists
-    print("\n1. Docker Image Check:")
+# orjson parses faster; this script only needs it if it is installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+GRAFANA_IMAGE = 'mcp/grafana'
+
+# Long-running container the backend talks to (see services/simple_mcp_client.py)
+GRAFANA_CONTAINER = 'jolly_cori'
+GRAFANA_CONTAINER_SERVER = '/app/mcp-grafana'
+
+# Docker image name -> whether it is present locally, probed once per process
+_DOCKER_IMAGE_CACHE = {}
+
+async def _docker_image_present(name):
+    """Check for a local Docker image with a single `docker image inspect`, by exit status"""
+    if name not in _DOCKER_IMAGE_CACHE:
+        process = await asyncio.create_subprocess_exec(
+            'docker', 'image', 'inspect', '--format={{.Id}}', name,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        _DOCKER_IMAGE_CACHE[name] = await process.wait() == 0
+    return _DOCKER_IMAGE_CACHE[name]
+
+async def _run_version(*command, env=None):
+    """Run `<command> --version`, giving up after 10 seconds"""
+    process = await asyncio.create_subprocess_exec(
+        *command, '--version',
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=10)
+    except asyncio.TimeoutError:
+        process.kill()
+        raise
+    return process.returncode, stdout.decode().strip(), stderr.decode()
+
+async def _check_docker():
+    """Tests 1 and 2: the image must exist before the server can be started"""
+    lines = ["\n1. Docker Image Check:"]
     try:
-        result = subprocess.run(['docker', 'images', 'mcp/grafana', '--format', 'table'], 
-                              capture_output=True, text=True)
-        if 'mcp/grafana' in result.stdout:
-            print("   ✓ MCP Grafana Docker image found")
+        if await _docker_image_present(GRAFANA_IMAGE):
+            lines.append("   ✓ MCP Grafana Docker image found")
         else:
-            print("   ✗ MCP Grafana Docker image not found")
-            return
+            lines.append("   ✗ MCP Grafana Docker image not found")
+            return lines
     except Exception as e:
-        print(f"   ✗ Error checking Docker image: {e}")
-        return
+        lines.append(f"   ✗ Error checking Docker image: {e}")
+        return lines
     
-    # Test 2: Try to run MCP server with environment variables
-    print("\n2. MCP Server Test:")
+    # Test 2: Try to run MCP server with environment variables (only reached if the image exists)
+    lines.append("\n2. MCP Server Test:")
     try:
-        env = os.environ.copy()
-        env.update({
-            'GRAFANA_URL': os.getenv('GRAFANA_URL', 'https://your-grafana-instance.com'),
-            'GRAFANA_API_KEY': os.getenv('GRAFANA_API_KEY', 'your-api-key-here')
-        })
-        
-        # Test if the server can start (just check help)
-        result = subprocess.run([
-            'docker', 'run', '--rm', 
-            '-e', f'GRAFANA_URL={os.getenv("GRAFANA_URL", "https://your-grafana-instance.com")}',
-            '-e', f'GRAFANA_API_KEY={os.getenv("GRAFANA_API_KEY", "your-api-key-here")}',
-            'mcp/grafana', '--version'
-        ], capture_output=True, text=True, timeout=10)
-        
-        if result.returncode == 0:
-            print(f"   ✓ MCP Grafana server can start: {result.stdout.strip()}")
+        # Test if the server can start (just check help); a running container
+        # answers without the cost of creating and removing a new one
+        returncode, stdout, stderr = await _run_version(
+            'docker', 'exec', GRAFANA_CONTAINER, GRAFANA_CONTAINER_SERVER
+        )
+        if returncode == 0:
+            lines.append(f"   ✓ MCP Grafana server runs in container {GRAFANA_CONTAINER}: {stdout}")
         else:
-            print(f"   ✗ MCP Grafana server failed to start: {result.stderr}")
-            
-    except subprocess.TimeoutExpired:
-        print("   ⚠️  MCP server test timed out (this might be normal)")
+            # Bare -e flags pass the values through docker's own environment,
+            # which keeps the API key out of the process command line
+            env = {
+                **os.environ,
+                'GRAFANA_URL': os.getenv('GRAFANA_URL', 'https://your-grafana-instance.com'),
+                'GRAFANA_API_KEY': os.getenv('GRAFANA_API_KEY', 'your-api-key-here'),
+            }
+            returncode, stdout, stderr = await _run_version(
+                'docker', 'run', '--rm', '-e', 'GRAFANA_URL', '-e', 'GRAFANA_API_KEY', GRAFANA_IMAGE,
+                env=env
+            )
+            if returncode == 0:
+                lines.append(f"   ✓ MCP Grafana server can start: {stdout}")
+            else:
+                lines.append(f"   ✗ MCP Grafana server failed to start: {stderr}")
+    
+    except asyncio.TimeoutError:
+        lines.append("   ⚠️  MCP server test timed out (this might be normal)")
     except Exception as e:
-        print(f"   ✗ Error testing MCP server: {e}")
+        lines.append(f"   ✗ Error testing MCP server: {e}")
     
-    # Test 3: Check configuration format
-    print("\n3. Configuration Check:")
+    return lines
+
+CONFIG_PATH = 'mcp_config.json'
+
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(path, mtime_ns):
+    """Parsed config file; the modification time in the key makes edits miss the cache"""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+def _read_config():
+    return _load_config_cached(CONFIG_PATH, os.stat(CONFIG_PATH).st_mtime_ns)
+
+async def _check_config():
+    """Test 3: Check configuration format"""
+    lines = ["\n3. Configuration Check:"]
     try:
-        with open('mcp_config.json', 'r') as f:
-            config = json.load(f)
+        config = await asyncio.get_running_loop().run_in_executor(None, _read_config)
         
         servers = config.get('servers', [])
-        print(f"   ✓ Found {len(servers)} server(s) in config")
+        lines.append(f"   ✓ Found {len(servers)} server(s) in config")
         
         for server in servers:
             name = server.get('name', 'unnamed')
             enabled = server.get('enabled', False)
             endpoint = server.get('endpoint', 'no endpoint')
-            print(f"     - {name}: {endpoint} ({'enabled' if enabled else 'disabled'})")
-            
+            lines.append(f"     - {name}: {endpoint} ({'enabled' if enabled else 'disabled'})")
+    
     except FileNotFoundError:
-        print("   ✗ mcp_config.json not found")
+        lines.append(f"   ✗ {CONFIG_PATH} not found")
     except Exception as e:
-        print(f"   ✗ Error reading config: {e}")
+        lines.append(f"   ✗ Error reading config: {e}")
+    
+    return lines
+
+async def test_mcp_grafana():
+    print("🔍 Testing MCP Grafana Integration")
+    print("=" * 50)
+    
+    # The Docker checks and the config check are independent, so run them
+    # together and print each one's report in order once all are done
+    for lines in await asyncio.gather(_check_docker(), _check_config()):
+        print("\n".join(lines))
     
     print("\n" + "=" * 50)
     print("💡 Next steps:")
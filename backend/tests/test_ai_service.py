@@ -5,12 +5,16 @@ Unit tests for AI Service with mocked AI responses.
 import pytest
 from unittest.mock import AsyncMock, Mock, patch
 import asyncio
+import anthropic
+import openai
 from backend.services.ai_service import (
     AIService, 
     AIProvider, 
     AIResponse, 
     AIServiceError, 
-    AIProviderError
+    AIProviderError,
+    _RateLimiter,
+    get_http_client
 )
 from backend.models.conversation import Conversation
 from backend.models.message import Message
@@ -25,6 +29,10 @@ class TestAIService:
         with patch('backend.services.ai_service.settings') as mock_settings:
             mock_settings.openai_api_key = "test-openai-key"
             mock_settings.anthropic_api_key = "test-anthropic-key"
+            mock_settings.openai_requests_per_minute = 0
+            mock_settings.openai_tokens_per_minute = 0
+            mock_settings.anthropic_requests_per_minute = 0
+            mock_settings.anthropic_tokens_per_minute = 0
             yield mock_settings
     
     @pytest.fixture
@@ -96,6 +104,17 @@ class TestAIService:
                 mock_openai.assert_called_once()
                 mock_anthropic.assert_called_once()
     
+    def test_ai_service_clients_share_http_pool(self, mock_settings):
+        """Test that provider clients reuse the shared HTTP connection pool"""
+        with patch('backend.services.ai_service.openai.AsyncOpenAI') as mock_openai:
+            with patch('backend.services.ai_service.anthropic.AsyncAnthropic') as mock_anthropic:
+                AIService(provider=AIProvider.OPENAI)
+                AIService(provider=AIProvider.ANTHROPIC)
+                
+                http_clients = [call.kwargs['http_client'] for call in mock_openai.call_args_list + mock_anthropic.call_args_list]
+                assert len(http_clients) == 4
+                assert all(client is get_http_client() for client in http_clients)
+    
     def test_ai_service_initialization_missing_key(self):
         """Test AI service initialization with missing API key"""
         with patch('backend.services.ai_service.settings') as mock_settings:
@@ -107,31 +126,29 @@ class TestAIService:
     
     def test_build_context_empty(self, ai_service_openai):
         """Test building context with no conversation history"""
-        messages = ai_service_openai.build_context()
+        context = ai_service_openai.build_context()
         
-        assert len(messages) == 1
-        assert messages[0]["role"] == "system"
-        assert "helpful AI assistant" in messages[0]["content"]
+        assert "helpful AI assistant" in context["system"]
+        assert context["messages"] == []
     
     def test_build_context_with_conversation(self, ai_service_openai, sample_conversation):
         """Test building context with conversation history"""
-        messages = ai_service_openai.build_context(conversation=sample_conversation)
+        context = ai_service_openai.build_context(conversation=sample_conversation)
+        messages = context["messages"]
         
-        assert len(messages) == 3  # system + 2 conversation messages
-        assert messages[0]["role"] == "system"
-        assert messages[1]["role"] == "user"
-        assert messages[1]["content"] == "Hello, how are you?"
-        assert messages[2]["role"] == "assistant"
-        assert messages[2]["content"] == "I'm doing well, thank you! How can I help you today?"
+        assert len(messages) == 2  # 2 conversation messages, system prompt kept separately
+        assert messages[0]["role"] == "user"
+        assert messages[0]["content"] == "Hello, how are you?"
+        assert messages[1]["role"] == "assistant"
+        assert messages[1]["content"] == "I'm doing well, thank you! How can I help you today?"
     
     def test_build_context_with_additional_context(self, ai_service_openai):
         """Test building context with additional context"""
         additional_context = "The user is asking about Python programming."
-        messages = ai_service_openai.build_context(additional_context=additional_context)
+        context = ai_service_openai.build_context(additional_context=additional_context)
         
-        assert len(messages) == 1
-        assert messages[0]["role"] == "system"
-        assert additional_context in messages[0]["content"]
+        assert context["messages"] == []
+        assert additional_context in context["system"]
     
     def test_build_context_limits_messages(self, ai_service_openai):
         """Test that context building limits message history"""
@@ -151,14 +168,45 @@ class TestAIService:
             updated_at=datetime.now()
         )
         
-        messages = ai_service_openai.build_context(conversation=conversation)
+        messages = ai_service_openai.build_context(conversation=conversation)["messages"]
         
-        # Should be system message + last 10 conversation messages
-        assert len(messages) == 11
-        assert messages[0]["role"] == "system"
+        # Should be the last 10 conversation messages
+        assert len(messages) == 10
+        assert messages[0]["content"] == "Message 5"
         # Check that it includes the last messages
         assert "Message 14" in messages[-1]["content"]
     
+    def test_build_context_picks_up_new_messages(self, ai_service_openai, sample_conversation):
+        """Test that cached history is extended when the conversation grows"""
+        first = ai_service_openai.build_context(conversation=sample_conversation)["messages"]
+        
+        sample_conversation.add_message(Message(
+            conversation_id="test-conv-1",
+            content="Tell me a joke",
+            sender="user"
+        ))
+        second = ai_service_openai.build_context(conversation=sample_conversation)["messages"]
+        
+        assert len(first) == 2
+        assert len(second) == 3
+        assert second[:2] == first
+        assert second[-1] == {"role": "user", "content": "Tell me a joke"}
+    
+    def test_build_context_token_estimate_tracks_window(self, ai_service_openai):
+        """Test that the cached token estimate follows the history window as it slides"""
+        conversation = Conversation(id="test-conv")
+        for i in range(12):
+            conversation.add_message(Message(
+                conversation_id="test-conv",
+                content="x" * 4 * (i + 1),
+                sender="user" if i % 2 == 0 else "assistant"
+            ))
+            context = ai_service_openai.build_context(conversation=conversation)
+        
+        # Messages 3..12 remain in the window, each worth i tokens
+        system_tokens = len(context["system"]) // 4
+        assert context["tokens"] == system_tokens + sum(range(3, 13))
+    
     @pytest.mark.asyncio
     async def test_generate_response_openai_success(self, ai_service_openai):
         """Test successful OpenAI response generation"""
@@ -180,6 +228,54 @@ class TestAIService:
         assert response.tokens_used == 50
         assert response.finish_reason == "stop"
     
+    @pytest.mark.asyncio
+    async def test_generate_responses_batch_coalesces_duplicates(self, ai_service_openai):
+        """Test identical prompts share one OpenAI request using n"""
+        def make_response(*contents):
+            mock_response = Mock()
+            mock_response.choices = [Mock() for _ in contents]
+            for choice, content in zip(mock_response.choices, contents):
+                choice.message.content = content
+                choice.finish_reason = "stop"
+            mock_response.usage.total_tokens = 40
+            return mock_response
+        
+        async def create(**kwargs):
+            if kwargs["n"] == 2:
+                return make_response("First", "Second")
+            return make_response("Other")
+        
+        ai_service_openai._openai_client.chat.completions.create = AsyncMock(side_effect=create)
+        
+        responses = await ai_service_openai.generate_responses_batch(["Hello", "Bye", "Hello"])
+        
+        assert [r.content for r in responses] == ["First", "Other", "Second"]
+        assert responses[0].tokens_used == 20
+        assert ai_service_openai._openai_client.chat.completions.create.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_stream_response_openai(self, ai_service_openai):
+        """Test that OpenAI output is yielded as it streams in"""
+        def make_chunk(content, finish_reason=None):
+            chunk = Mock()
+            chunk.choices = [Mock()]
+            chunk.choices[0].delta.content = content
+            chunk.choices[0].finish_reason = finish_reason
+            return chunk
+        
+        async def stream():
+            for chunk in (make_chunk("Hel"), make_chunk("lo"), make_chunk(None, "stop")):
+                yield chunk
+        
+        ai_service_openai._openai_client.chat.completions.create = AsyncMock(return_value=stream())
+        
+        deltas = [delta async for delta in ai_service_openai.stream_response("Hello, world!")]
+        
+        assert [delta.content for delta in deltas] == ["Hel", "lo", ""]
+        assert deltas[-1].finish_reason == "stop"
+        assert deltas[-1].mcp_tools_used == []
+        assert ai_service_openai._openai_client.chat.completions.create.call_args.kwargs["stream"] is True
+    
     @pytest.mark.asyncio
     async def test_generate_response_anthropic_success(self, ai_service_anthropic):
         """Test successful Anthropic response generation"""
@@ -200,13 +296,17 @@ class TestAIService:
         assert response.provider == "anthropic"
         assert response.tokens_used == 50  # 20 + 30
         assert response.finish_reason == "end_turn"
+        
+        # System prompt is passed separately from the conversation messages
+        call_kwargs = ai_service_anthropic._anthropic_client.messages.create.call_args.kwargs
+        assert "helpful AI assistant" in call_kwargs["system"]
+        assert call_kwargs["messages"] == [{"role": "user", "content": "Hello, world!"}]
     
     @pytest.mark.asyncio
     async def test_generate_response_openai_api_error(self, ai_service_openai):
         """Test OpenAI API error handling"""
-        # Use a generic exception that will be caught as an API error
         ai_service_openai._openai_client.chat.completions.create = AsyncMock(
-            side_effect=Exception("OpenAI API Error")
+            side_effect=openai.APIError("OpenAI API Error", request=Mock(), body=None)
         )
         
         with pytest.raises(AIProviderError, match="Provider error"):
@@ -215,14 +315,52 @@ class TestAIService:
     @pytest.mark.asyncio
     async def test_generate_response_anthropic_api_error(self, ai_service_anthropic):
         """Test Anthropic API error handling"""
-        # Use a generic exception that will be caught as an API error
         ai_service_anthropic._anthropic_client.messages.create = AsyncMock(
-            side_effect=Exception("Anthropic API Error")
+            side_effect=anthropic.APIError("Anthropic API Error", request=Mock(), body=None)
         )
         
         with pytest.raises(AIProviderError, match="Provider error"):
             await ai_service_anthropic.generate_response("Hello, world!")
     
+    @pytest.mark.asyncio
+    async def test_generate_response_unexpected_error_propagates(self, ai_service_openai):
+        """Test that non-provider errors are not disguised as provider errors"""
+        ai_service_openai._openai_client.chat.completions.create = AsyncMock(
+            side_effect=ValueError("bad value")
+        )
+        
+        with pytest.raises(ValueError, match="bad value"):
+            await ai_service_openai.generate_response("Hello, world!")
+    
+    @pytest.mark.asyncio
+    async def test_generate_response_race_returns_fastest(self, ai_service_openai):
+        """Test that racing providers returns the first answer and cancels the other"""
+        cancelled = asyncio.Event()
+        
+        async def slow_create(**kwargs):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        mock_response = Mock()
+        mock_response.content = [Mock()]
+        mock_response.content[0].text = "Anthropic was faster"
+        mock_response.stop_reason = "end_turn"
+        mock_response.usage.input_tokens = 5
+        mock_response.usage.output_tokens = 5
+        
+        ai_service_openai._openai_client.chat.completions.create = AsyncMock(side_effect=slow_create)
+        ai_service_openai._anthropic_client.messages.create = AsyncMock(return_value=mock_response)
+        
+        response = await ai_service_openai.generate_response_race("Hello, world!")
+        
+        assert response.content == "Anthropic was faster"
+        assert response.provider == "anthropic"
+        assert response.model == "claude-3-5-sonnet-20241022"
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+    
     @pytest.mark.asyncio
     async def test_generate_response_timeout(self, ai_service_openai):
         """Test timeout handling"""
@@ -233,6 +371,19 @@ class TestAIService:
         with pytest.raises(AIServiceError, match="Request timed out"):
             await ai_service_openai.generate_response("Hello, world!")
     
+    @pytest.mark.asyncio
+    async def test_generate_response_sdk_timeout(self, ai_service_anthropic):
+        """Test that the SDK's own request timeout is used and reported as a timeout"""
+        ai_service_anthropic._anthropic_client.messages.create = AsyncMock(
+            side_effect=anthropic.APITimeoutError(request=Mock())
+        )
+        
+        with pytest.raises(AIServiceError, match="Request timed out"):
+            await ai_service_anthropic.generate_response("Hello, world!")
+        
+        call_kwargs = ai_service_anthropic._anthropic_client.messages.create.call_args.kwargs
+        assert call_kwargs["timeout"] == ai_service_anthropic.timeout
+    
     @pytest.mark.asyncio
     async def test_generate_response_with_conversation_context(self, ai_service_openai, sample_conversation):
         """Test response generation with conversation context"""
@@ -263,6 +414,68 @@ class TestAIService:
         assert messages[3]["role"] == "user"
         assert messages[3]["content"] == "What did I just ask?"
     
+    @pytest.mark.asyncio
+    async def test_generate_response_skips_tools_for_short_prompt(self, ai_service_openai):
+        """Test that trivially short prompts never reach MCP tool discovery"""
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Hi there"
+        mock_response.choices[0].finish_reason = "stop"
+        mock_response.usage.total_tokens = 5
+        
+        ai_service_openai._openai_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        ai_service_openai.get_relevant_tools = AsyncMock(return_value=[])
+        
+        response = await ai_service_openai.generate_response("ok")
+        
+        assert response.content == "Hi there"
+        assert response.mcp_tools_used == []
+        ai_service_openai.get_relevant_tools.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_get_relevant_tools_skips_small_talk(self, ai_service_openai):
+        """Test that greetings and acknowledgements never reach the MCP manager"""
+        mock_manager = Mock()
+        mock_manager.get_relevant_tools = AsyncMock(return_value=["search_dashboards"])
+        ai_service_openai.mcp_manager = mock_manager
+        
+        for prompt in ["Hello there!", "thanks so much", "Okay."]:
+            assert await ai_service_openai.get_relevant_tools(prompt) == []
+        mock_manager.get_relevant_tools.assert_not_called()
+        
+        assert await ai_service_openai.get_relevant_tools("ok, show me the dashboards") == ["search_dashboards"]
+    
+    @pytest.mark.asyncio
+    async def test_get_tool_context_selects_and_calls_once(self, ai_service_openai):
+        """Test that tool selection and invocation happen in one MCP call"""
+        tool_result = Mock(tool_name="search_dashboards")
+        mock_manager = Mock()
+        mock_manager.select_and_call = AsyncMock(return_value=(["search_dashboards"], [tool_result]))
+        mock_manager.call_multiple_tools = AsyncMock(return_value=[tool_result])
+        mock_manager.format_tool_results = Mock(return_value="Grafana Data:")
+        ai_service_openai.mcp_manager = mock_manager
+        
+        tool_context = await ai_service_openai._get_tool_context("Show me Grafana dashboards")
+        
+        assert tool_context == (["search_dashboards"], "Grafana Data:")
+        mock_manager.select_and_call.assert_called_once_with("Show me Grafana dashboards")
+        mock_manager.call_multiple_tools.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_prewarm_opens_provider_connections(self, ai_service_openai):
+        """Test that prewarm hits each configured provider and tolerates failures"""
+        ai_service_openai._openai_client.base_url = "https://api.openai.com/v1/"
+        ai_service_openai._anthropic_client.base_url = "https://api.anthropic.com"
+        
+        mock_http_client = Mock()
+        mock_http_client.head = AsyncMock(side_effect=[Mock(), Exception("Connection refused")])
+        
+        with patch('backend.services.ai_service.get_http_client', return_value=mock_http_client):
+            await ai_service_openai.prewarm()
+        
+        urls = [call.args[0] for call in mock_http_client.head.call_args_list]
+        assert urls == ["https://api.openai.com/v1/", "https://api.anthropic.com"]
+    
     def test_get_available_providers(self, ai_service_openai):
         """Test getting available providers"""
         providers = ai_service_openai.get_available_providers()
@@ -289,6 +502,22 @@ class TestAIService:
             with pytest.raises(AIServiceError, match="Anthropic not available"):
                 service.switch_provider(AIProvider.ANTHROPIC)
     
+    @pytest.mark.asyncio
+    async def test_rate_limiter_waits_for_refill(self):
+        """Test that the rate limiter delays requests beyond the per-minute limit"""
+        limiter = _RateLimiter(requests_per_minute=1)
+        
+        def advance_clock(seconds):
+            limiter._last_refill -= seconds
+        
+        with patch('backend.services.ai_service.asyncio.sleep', AsyncMock(side_effect=advance_clock)) as mock_sleep:
+            await limiter.acquire(10)
+            mock_sleep.assert_not_called()
+            
+            await limiter.acquire(10)
+            mock_sleep.assert_called_once()
+            assert mock_sleep.call_args.args[0] == pytest.approx(60, abs=1)
+    
     def test_ai_response_dataclass(self):
         """Test AIResponse dataclass"""
         response = AIResponse(
@@ -304,6 +533,8 @@ class TestAIService:
         assert response.model == "gpt-3.5-turbo"
         assert response.tokens_used == 100
         assert response.finish_reason == "stop"
+        assert response.mcp_tools_used == []
+        assert response.mcp_tools_used is not AIResponse("", "openai", "gpt").mcp_tools_used
     
     def test_ai_service_error_inheritance(self):
         """Test AI service error classes"""
@@ -14,7 +14,8 @@ from backend.services.mcp_client import (
     MCPProtocolClient,
     MCPConnectionError,
     MCPProtocolError,
-    MCPTimeoutError
+    MCPTimeoutError,
+    health_check_all
 )
 
 
@@ -48,7 +49,7 @@ def mock_initialize_response():
     """Mock response for initialize request"""
     return {
         "jsonrpc": "2.0",
-        "id": "test-server-1",
+        "id": 1,
         "result": {
             "protocolVersion": "2024-11-05",
             "capabilities": {
@@ -67,7 +68,7 @@ def mock_tools_list_response():
     """Mock response for tools/list request"""
     return {
         "jsonrpc": "2.0",
-        "id": "test-server-2",
+        "id": 2,
         "result": {
             "tools": [
                 {
@@ -100,7 +101,7 @@ def mock_tool_call_response():
     """Mock response for tools/call request"""
     return {
         "jsonrpc": "2.0",
-        "id": "test-server-3",
+        "id": 3,
         "result": {
             "content": [
                 {
@@ -128,6 +129,17 @@ class TestMCPProtocolClient:
         assert client.available_tools == []
         assert client.server_info == {}
     
+    def test_client_built_outside_event_loop(self, sample_config):
+        """Test that a client built before its event loop starts can send in that loop"""
+        client = MCPProtocolClient(sample_config)
+        client._send_impl = AsyncMock(return_value={"jsonrpc": "2.0", "id": 1, "result": {}})
+        
+        async def send():
+            return await client._send_payload({"jsonrpc": "2.0", "id": 1, "method": "ping"}, 5)
+        
+        assert asyncio.run(send()) == {"jsonrpc": "2.0", "id": 1, "result": {}}
+        assert client._inflight is not None
+    
     @pytest.mark.asyncio
     async def test_http_connection_success(self, sample_config, mock_initialize_response, mock_tools_list_response):
         """Test successful HTTP connection"""
@@ -165,12 +177,18 @@ class TestMCPProtocolClient:
         """Test successful WebSocket connection"""
         client = MCPProtocolClient(websocket_config)
         
+        # Answer each request with the next canned response, echoing its id
+        responses = iter([mock_initialize_response, mock_tools_list_response])
+        incoming = asyncio.Queue()
+        
+        async def send(message):
+            request = json.loads(message)
+            if "id" in request:
+                await incoming.put(json.dumps({**next(responses), "id": request["id"]}))
+        
         mock_websocket = AsyncMock()
-        mock_websocket.send = AsyncMock()
-        mock_websocket.recv = AsyncMock(side_effect=[
-            json.dumps(mock_initialize_response),
-            json.dumps(mock_tools_list_response)
-        ])
+        mock_websocket.send = AsyncMock(side_effect=send)
+        mock_websocket.recv = AsyncMock(side_effect=incoming.get)
         mock_websocket.close = AsyncMock()
         
         async def mock_connect_func(*args, **kwargs):
@@ -229,7 +247,7 @@ class TestMCPProtocolClient:
         
         ping_response = {
             "jsonrpc": "2.0",
-            "id": "test-server-1",
+            "id": 1,
             "result": "pong"
         }
         
@@ -254,7 +272,7 @@ class TestMCPProtocolClient:
         
         error_response = {
             "jsonrpc": "2.0",
-            "id": "test-server-1",
+            "id": 1,
             "error": {"code": -1, "message": "Server error"}
         }
         
@@ -276,6 +294,46 @@ class TestMCPProtocolClient:
         
         assert is_healthy is False
     
+    @pytest.mark.asyncio
+    async def test_health_check_retries_timeouts(self, sample_config):
+        """Test that a timed out ping is retried with backoff before failing"""
+        client = MCPProtocolClient(sample_config)
+        client.is_connected = True
+        client.connection_type = "http"
+        client._send_raw = AsyncMock(side_effect=[MCPTimeoutError("timed out"), {"result": {}}])
+        
+        with patch("backend.services.mcp_client.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            is_healthy = await client.health_check()
+        
+        assert is_healthy is True
+        assert client._send_raw.call_count == 2
+        assert client._send_raw.call_args_list[1].kwargs["timeout"] > client._send_raw.call_args_list[0].kwargs["timeout"]
+        mock_sleep.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_health_check_all(self, sample_config):
+        """Test concurrent health checks across clients"""
+        healthy = MCPProtocolClient(sample_config)
+        healthy.health_check = AsyncMock(return_value=True)
+        broken = MCPProtocolClient(sample_config)
+        broken.health_check = AsyncMock(side_effect=RuntimeError("boom"))
+        
+        assert await health_check_all([healthy, broken]) == [True, False]
+    
+    @pytest.mark.asyncio
+    async def test_health_check_all_without_ping(self, sample_config):
+        """Test that a server without ping support is health checked with tools/list"""
+        client = MCPProtocolClient(sample_config)
+        client.health_check = AsyncMock(side_effect=NotImplementedError("ping not supported"))
+        client.list_tools = AsyncMock(return_value=[])
+        
+        assert await health_check_all([client]) == [True]
+        assert await health_check_all([client]) == [True]
+        
+        # Ping is only tried until the server says it doesn't support it
+        client.health_check.assert_called_once()
+        assert client.list_tools.call_count == 2
+    
     @pytest.mark.asyncio
     async def test_list_tools_success(self, sample_config, mock_tools_list_response):
         """Test successful tool listing"""
@@ -336,7 +394,7 @@ class TestMCPProtocolClient:
         
         error_response = {
             "jsonrpc": "2.0",
-            "id": "test-server-1",
+            "id": 1,
             "error": {"code": -32602, "message": "Invalid params"}
         }
         
@@ -381,6 +439,116 @@ class TestMCPProtocolClient:
             
         await client.session.close()
     
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_sent_as_batch(self, sample_config):
+        """Test that concurrent tool calls share one JSON-RPC batch request"""
+        client = MCPProtocolClient(sample_config)
+        client.is_connected = True
+        client.connection_type = "http"
+        client.session = aiohttp.ClientSession()
+        
+        # Responses arrive out of order and are matched by id
+        batch_response = [
+            {"jsonrpc": "2.0", "id": 2, "result": {"content": "second"}},
+            {"jsonrpc": "2.0", "id": 1, "result": {"content": "first"}}
+        ]
+        
+        with aioresponses() as m:
+            m.post(sample_config.endpoint, payload=batch_response)
+            
+            first, second = await asyncio.gather(
+                client.call_tool("get_weather", {"location": "New York"}),
+                client.call_tool("calculate", {"expression": "2+2"})
+            )
+            
+            assert first.result == {"content": "first"}
+            assert second.result == {"content": "second"}
+            
+            requests = [call for calls in m.requests.values() for call in calls]
+            assert len(requests) == 1
+            assert [r["method"] for r in json.loads(requests[0].kwargs["data"])] == ["tools/call", "tools/call"]
+            
+        await client.session.close()
+    
+    @pytest.mark.asyncio
+    async def test_rejected_batch_falls_back_to_single_requests(self, sample_config):
+        """Test that a batch rejected with an HTTP error is resent one request at a time"""
+        client = MCPProtocolClient(sample_config)
+        client.is_connected = True
+        client.connection_type = "http"
+        client.session = aiohttp.ClientSession()
+        
+        with aioresponses() as m:
+            m.post(sample_config.endpoint, status=400, body="batch requests not supported")
+            m.post(
+                sample_config.endpoint,
+                payload={"jsonrpc": "2.0", "id": 1, "result": {"content": "ok"}},
+                repeat=True
+            )
+            
+            first, second = await asyncio.gather(
+                client.call_tool("get_weather", {"location": "New York"}),
+                client.call_tool("calculate", {"expression": "2+2"})
+            )
+            
+            assert first.status == second.status == "success"
+            assert first.result == second.result == {"content": "ok"}
+            assert client._batching_supported is False
+            
+            # One rejected batch, then each request on its own
+            requests = [call for calls in m.requests.values() for call in calls]
+            assert len(requests) == 3
+            assert isinstance(json.loads(requests[0].kwargs["data"]), list)
+            assert all(isinstance(json.loads(r.kwargs["data"]), dict) for r in requests[1:])
+            
+        await client.session.close()
+    
+    @pytest.mark.asyncio
+    async def test_failed_batch_keeps_batching(self, sample_config):
+        """Test that a server error on a batch fails its requests without disabling batching"""
+        client = MCPProtocolClient(sample_config)
+        client.is_connected = True
+        client.connection_type = "http"
+        client.session = aiohttp.ClientSession()
+        
+        with aioresponses() as m:
+            m.post(sample_config.endpoint, status=503, body="unavailable", repeat=True)
+            
+            first, second = await asyncio.gather(
+                client.call_tool("get_weather", {"location": "New York"}),
+                client.call_tool("calculate", {"expression": "2+2"})
+            )
+            
+            assert first.status == second.status == "error"
+            assert client._batching_supported is True
+            
+            # The batch is not resent one request at a time
+            requests = [call for calls in m.requests.values() for call in calls]
+            assert len(requests) == 1
+            
+        await client.session.close()
+    
+    @pytest.mark.asyncio
+    async def test_call_tool_caches_cacheable_tools(self, sample_config, mock_tool_call_response):
+        """Test that repeated calls to a cacheable tool reuse the first result"""
+        sample_config.cacheable_tools = ["get_weather"]
+        client = MCPProtocolClient(sample_config)
+        client.is_connected = True
+        client.connection_type = "http"
+        client.session = aiohttp.ClientSession()
+        
+        with aioresponses() as m:
+            m.post(sample_config.endpoint, payload=mock_tool_call_response)
+            
+            first = await client.call_tool("get_weather", {"location": "New York"})
+            second = await client.call_tool("get_weather", {"location": "New York"})
+            
+            assert first.status == second.status == "success"
+            assert second.result == first.result
+            assert sum(len(calls) for calls in m.requests.values()) == 1
+            
+        await client.session.close()
+    
     @pytest.mark.asyncio
     async def test_disconnect(self, sample_config):
         """Test disconnection"""
@@ -414,8 +582,9 @@ class TestMCPProtocolClient:
         info = client.get_server_info()
         
         assert info == {"name": "test-server", "version": "1.0.0"}
-        # Ensure it's a copy
-        info["modified"] = True
+        # Ensure it's read-only
+        with pytest.raises(TypeError):
+            info["modified"] = True
         assert "modified" not in client.server_info
     
     def test_get_available_tools(self, sample_config):
@@ -427,9 +596,104 @@ class TestMCPProtocolClient:
         
         assert len(tools) == 2
         assert tools[0]["name"] == "tool1"
-        # Ensure it's a copy
-        tools.append({"name": "tool3"})
-        assert len(client.available_tools) == 2
+        # Ensure it's read-only and reused between calls
+        assert isinstance(tools, tuple)
+        assert client.get_available_tools() is tools
+    
+    @pytest.mark.asyncio
+    async def test_discovered_tools_share_schemas(self, sample_config):
+        """Test that identical tool definitions from separate discoveries share one dict"""
+        first = MCPProtocolClient(sample_config)
+        second = MCPProtocolClient(sample_config)
+        
+        def tools_response():
+            return {"result": {"tools": [{"name": "get_weather", "inputSchema": {"type": "object"}}]}}
+        
+        for client in (first, second):
+            client._send_request = AsyncMock(return_value=tools_response())
+            await client._discover_tools()
+        
+        assert first.available_tools[0] == {"name": "get_weather", "inputSchema": {"type": "object"}}
+        assert first.available_tools[0] is second.available_tools[0]
+    
+    @pytest.mark.asyncio
+    async def test_http_tool_discovery_error_response(self, sample_config):
+        """Test that a JSON-RPC error reply to tools/list over HTTP is reported, not read as no tools"""
+        client = MCPProtocolClient(sample_config)
+        client.connection_type = "http"
+        client.session = aiohttp.ClientSession()
+        client.available_tools = [{"name": "get_weather"}]
+        
+        error_response = {"jsonrpc": "2.0", "id": 1, "error": {"code": -32603, "message": "Internal error"}}
+        
+        with aioresponses() as m:
+            m.post(sample_config.endpoint, payload=error_response, repeat=True)
+            
+            with pytest.raises(MCPProtocolError, match="Internal error"):
+                await client._stream_http_tools()
+            
+            # Discovery logs the failure and keeps the tools it already had
+            with patch("backend.services.mcp_client.logger") as mock_logger:
+                await client._discover_tools()
+            
+            mock_logger.error.assert_called_once()
+            assert client.available_tools == [{"name": "get_weather"}]
+            
+        await client.session.close()
+    
+    @pytest.mark.asyncio
+    async def test_http_tool_discovery_error_status(self, sample_config):
+        """Test that a JSON-RPC error sent with an error status is reported before the status"""
+        client = MCPProtocolClient(sample_config)
+        client.connection_type = "http"
+        client.session = aiohttp.ClientSession()
+        
+        error_response = {"jsonrpc": "2.0", "id": 1, "error": {"code": -32603, "message": "Internal error"}}
+        
+        with aioresponses() as m:
+            m.post(sample_config.endpoint, status=500, payload=error_response)
+            with pytest.raises(MCPProtocolError, match="Internal error"):
+                await client._stream_http_tools()
+            
+            # Without a JSON-RPC body the HTTP status is reported
+            m.post(sample_config.endpoint, status=502, body="<html>Bad Gateway</html>")
+            with pytest.raises(MCPConnectionError, match="HTTP 502"):
+                await client._stream_http_tools()
+            
+        await client.session.close()
+    
+    @pytest.mark.asyncio
+    async def test_tool_summaries_and_schema(self, sample_config):
+        """Test compact tool summaries and lookup of full tool schemas"""
+        client = MCPProtocolClient(sample_config)
+        schema = {"type": "object", "properties": {"location": {"type": "string"}}}
+        client.available_tools = [
+            {"name": "get_weather", "description": "Get the weather. Uses a remote API.", "inputSchema": schema},
+            {"name": "calculate"}
+        ]
+        
+        assert client.get_tool_summaries() == [
+            {"name": "get_weather", "summary": "Get the weather"},
+            {"name": "calculate", "summary": ""}
+        ]
+        
+        tool = await client.get_tool_schema("get_weather")
+        assert tool["inputSchema"] == schema
+        assert await client.get_tool_schema("missing") is None
+    
+    def test_find_tools(self, sample_config):
+        """Test keyword search over tool names, descriptions and tags"""
+        client = MCPProtocolClient(sample_config)
+        client.available_tools = [
+            {"name": "get_weather", "description": "Get the current weather for a location"},
+            {"name": "get_forecast", "description": "Weather forecast for the coming days", "tags": ["weather"]},
+            {"name": "calculate", "description": "Evaluate a math expression"}
+        ]
+        
+        assert client.find_tools("what's the weather forecast?") == ["get_forecast", "get_weather"]
+        assert client.find_tools("weather", k=1) == ["get_weather"]
+        assert client.find_tools("math") == ["calculate"]
+        assert client.find_tools("hello") == []
     
     def test_str_representation(self, sample_config):
         """Test string representation"""
@@ -448,11 +712,8 @@ class TestMCPProtocolClient:
         id1 = client._get_next_request_id()
         id2 = client._get_next_request_id()
         
-        assert id1 != id2
-        assert "test-server" in id1
-        assert "test-server" in id2
-        assert id1.endswith("-1")
-        assert id2.endswith("-2")
+        assert id1 == 1
+        assert id2 == 2
 
 
 @pytest.mark.asyncio
@@ -481,6 +742,41 @@ async def test_websocket_connection_lost():
     assert not client.is_connected
 
 
+@pytest.mark.asyncio
+async def test_websocket_requests_pipelined(websocket_config):
+    """Test that concurrent WebSocket requests share the socket and are matched by id"""
+    client = MCPProtocolClient(websocket_config)
+    client.is_connected = True
+    client.connection_type = "websocket"
+    client.batch_max = 1  # Send each request in its own frame
+    
+    incoming = asyncio.Queue()
+    sent = []
+    
+    async def send(message):
+        sent.append(json.loads(message))
+        # Answer only once both requests are in flight, in reverse order
+        if len(sent) == 2:
+            for request in reversed(sent):
+                await incoming.put(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": request["params"]["name"]}))
+    
+    mock_websocket = AsyncMock()
+    mock_websocket.send = AsyncMock(side_effect=send)
+    mock_websocket.recv = AsyncMock(side_effect=incoming.get)
+    mock_websocket.close = AsyncMock()
+    client.websocket = mock_websocket
+    
+    first, second = await asyncio.gather(
+        client.call_tool("get_weather", {}),
+        client.call_tool("calculate", {})
+    )
+    
+    assert first.result == "get_weather"
+    assert second.result == "calculate"
+    
+    await client.disconnect()
+
+
 @pytest.mark.asyncio
 async def test_invalid_json_response():
     """Test handling of invalid JSON responses"""
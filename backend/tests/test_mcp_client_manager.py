@@ -8,7 +8,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from typing import Dict, Any
 
 from backend.models.mcp import MCPServerConfig, MCPToolCall
-from backend.services.mcp_client_manager import MCPClientManager, MCPClientManagerError
+from backend.services.mcp_client_manager import MCPClientManager, MCPClientManagerError, MAX_PARALLEL_CALLS_PER_SERVER
 from backend.services.mcp_config_manager import MCPConfigManager
 from backend.services.mcp_client import MCPProtocolClient
 
@@ -232,6 +232,36 @@ class TestMCPClientManager:
             assert "calc-server" in manager.connected_servers
             assert "weather-server" not in manager.connected_servers
     
+    @pytest.mark.asyncio
+    async def test_connect_to_servers_cancelled(self, mock_config_manager, mock_client_factory):
+        """Test that cancelling connect_to_servers cancels pending connects and keeps finished ones"""
+        manager = MCPClientManager(mock_config_manager)
+        connect_started = asyncio.Event()
+        
+        def create_client_with_hang(config):
+            client = mock_client_factory(config.name, True)
+            if config.name == "weather-server":
+                async def hang():
+                    connect_started.set()
+                    await asyncio.sleep(3600)
+                client.connect.side_effect = hang
+            return client
+        
+        with patch('backend.services.mcp_client_manager.MCPProtocolClient') as mock_client_class:
+            mock_client_class.side_effect = create_client_with_hang
+            
+            task = asyncio.create_task(manager.connect_to_servers())
+            await connect_started.wait()
+            await asyncio.sleep(0)
+            task.cancel()
+            
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            
+            assert manager.connected_servers == {"calc-server"}
+            assert manager._connected_snapshot == frozenset({"calc-server"})
+            assert not manager._connection_lock.locked()
+    
     @pytest.mark.asyncio
     async def test_connect_to_servers_no_enabled(self, mock_config_manager):
         """Test connecting when no servers are enabled"""
@@ -330,6 +360,81 @@ class TestMCPClientManager:
             # Failed server should be removed from connected servers
             assert "weather-server" not in manager.connected_servers
     
+    @pytest.mark.asyncio
+    async def test_health_check_servers_uses_background_results(self, mock_config_manager, mock_client_factory):
+        """Test that health results come from the background loop after initialization"""
+        manager = MCPClientManager(mock_config_manager)
+        
+        with patch('backend.services.mcp_client_manager.MCPProtocolClient') as mock_client_class:
+            mock_client_class.side_effect = lambda config: mock_client_factory(config.name, True)
+            
+            await manager.initialize()
+            # Let the first background check run
+            await asyncio.sleep(0.01)
+            
+            health_results = await manager.health_check_servers()
+            
+            assert health_results == {"weather-server": True, "calc-server": True}
+            for client in manager.clients.values():
+                client.health_check.assert_called_once()
+            
+            await manager.shutdown()
+            assert manager._health_task is None
+    
+    @pytest.mark.asyncio
+    async def test_health_loop_drops_failed_servers(self, mock_config_manager, mock_client_factory):
+        """Test that the background loop takes a failed server out of the tool call path"""
+        manager = MCPClientManager(mock_config_manager)
+        manager.health_check_interval = 0.01
+        
+        with patch('backend.services.mcp_client_manager.MCPProtocolClient') as mock_client_class:
+            mock_client_class.side_effect = lambda config: mock_client_factory(config.name, True)
+            
+            await manager.initialize()
+            manager.clients["weather-server"].health_check.return_value = False
+            await asyncio.sleep(0.05)
+            
+            assert "weather-server" not in manager._connected_snapshot
+            assert "weather-server" not in manager.get_available_tools()
+            tool_call = await manager.call_tool("weather-server", "get_weather", {"location": "Paris"})
+            assert tool_call.status == "error"
+            
+            await manager.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_health_check_servers_reuses_recent_results(self, mock_config_manager, mock_client_factory):
+        """Test that on-demand health checks within the TTL share one round of checks"""
+        manager = MCPClientManager(mock_config_manager)
+        
+        with patch('backend.services.mcp_client_manager.MCPProtocolClient') as mock_client_class:
+            mock_client_class.side_effect = lambda config: mock_client_factory(config.name, True)
+            
+            await manager.connect_to_servers()
+            
+            first = await manager.health_check_servers()
+            second = await manager.health_check_servers()
+            
+            assert first == second == {"weather-server": True, "calc-server": True}
+            for client in manager.clients.values():
+                client.health_check.assert_called_once()
+            
+            manager.health_cache_ttl = 0
+            await manager.health_check_servers()
+            for client in manager.clients.values():
+                assert client.health_check.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_health_check_falls_back_without_ping(self, mock_config_manager, mock_client_factory):
+        """Test that servers without ping support are health checked with list_tools"""
+        manager = MCPClientManager(mock_config_manager)
+        client = mock_client_factory("weather-server", True)
+        client.health_check.side_effect = NotImplementedError("ping not supported")
+        
+        is_healthy = await manager._health_check_single_server("weather-server", client)
+        
+        assert is_healthy is True
+        client.list_tools.assert_called_once()
+    
     def test_get_available_tools(self, mock_config_manager, sample_tools):
         """Test getting available tools"""
         manager = MCPClientManager(mock_config_manager)
@@ -344,6 +449,22 @@ class TestMCPClientManager:
         tools["new-server"] = []
         assert "new-server" not in manager.available_tools
     
+    def test_get_tools_bulk(self, mock_config_manager, sample_tools):
+        """Test getting tools for several servers at once"""
+        manager = MCPClientManager(mock_config_manager)
+        manager.available_tools = sample_tools
+        
+        tools = manager.get_tools_bulk(["calc-server", "unknown-server"])
+        
+        assert list(tools) == ["calc-server", "unknown-server"]
+        assert tools["calc-server"] == sample_tools["calc-server"]
+        assert tools["unknown-server"] == []
+        assert manager.get_tools_bulk([]) == {}
+        
+        # Callers get their own lists
+        tools["calc-server"].clear()
+        assert len(manager.available_tools["calc-server"]) == len(sample_tools["calc-server"]) > 0
+    
     def test_get_all_tools_flat(self, mock_config_manager, sample_tools):
         """Test getting all tools as flat list"""
         manager = MCPClientManager(mock_config_manager)
@@ -393,6 +514,40 @@ class TestMCPClientManager:
             assert "relevance_score" in tool
             assert tool["relevance_score"] > 0
     
+    def test_find_tools_by_description_scores_repeated_keywords_once(self, mock_config_manager, sample_tools):
+        """Test that repeating a keyword doesn't raise a tool's score"""
+        manager = MCPClientManager(mock_config_manager)
+        manager.available_tools = sample_tools
+        
+        once = manager.find_tools_by_description(["weather"])
+        repeated = manager.find_tools_by_description(["weather", "Weather", "weather"])
+        
+        assert [(t["name"], t["relevance_score"]) for t in repeated] == [(t["name"], t["relevance_score"]) for t in once]
+    
+    def test_find_tools_by_description_matches_partial_names(self, mock_config_manager):
+        """Test that keywords matching part of a tool name still get the name score"""
+        manager = MCPClientManager(mock_config_manager)
+        manager.available_tools = {"grafana-server": [
+            {"name": "search_dashboards", "description": "Find panels"}
+        ]}
+        
+        for keyword in ["dashboard", "dash", "search_dash"]:
+            tools = manager.find_tools_by_description([keyword])
+            assert [(t["name"], t["relevance_score"]) for t in tools] == [("search_dashboards", 3)]
+    
+    def test_select_tools_for_query_stops_at_best_matches(self, mock_config_manager):
+        """Test that scoring stops once enough tools have the best possible score"""
+        manager = MCPClientManager(mock_config_manager)
+        manager.available_tools = {"search-server": [
+            {"name": f"search_{i}", "description": "Search the index"} for i in range(3)
+        ]}
+        
+        assert len(manager._score_tools(["search"])) == 3
+        assert len(manager._score_tools(["search"], max_tools=1)) == 1
+        
+        tools = manager.select_tools_for_query("search", max_tools=2)
+        assert [t["name"] for t in tools] == ["search_0", "search_1"]
+    
     @pytest.mark.asyncio
     async def test_call_tool_success(self, mock_config_manager, mock_client_factory):
         """Test successful tool call"""
@@ -487,6 +642,137 @@ class TestMCPClientManager:
             assert results[0].server_name == "weather-server"
             assert results[1].server_name == "calc-server"
     
+    @pytest.mark.asyncio
+    async def test_call_tools_parallel_single_call(self, mock_config_manager, mock_client_factory):
+        """Test that a single call is awaited directly and its exception becomes an error result"""
+        manager = MCPClientManager(mock_config_manager)
+        
+        with patch('backend.services.mcp_client_manager.MCPProtocolClient') as mock_client_class:
+            mock_client_class.side_effect = lambda config: mock_client_factory(config.name, True)
+            
+            await manager.connect_to_servers()
+            
+            tool_calls = [
+                {
+                    "server_name": "calc-server",
+                    "tool_name": "calculate",
+                    "parameters": {"expression": "2 + 2"}
+                }
+            ]
+            
+            with patch('backend.services.mcp_client_manager.asyncio.gather') as mock_gather:
+                results = await manager.call_tools_parallel(tool_calls)
+                
+                with patch.object(manager, 'call_tool', side_effect=RuntimeError("boom")):
+                    failed = await manager.call_tools_parallel(tool_calls)
+            
+            mock_gather.assert_not_called()
+            assert results[0].status == "success"
+            assert failed[0].status == "error"
+            assert "boom" in failed[0].error
+    
+    @pytest.mark.asyncio
+    async def test_call_tools_parallel_keeps_input_order(self, mock_config_manager, mock_client_factory):
+        """Test that rejected, failed and successful calls come back in input order"""
+        manager = MCPClientManager(mock_config_manager)
+        
+        with patch('backend.services.mcp_client_manager.MCPProtocolClient') as mock_client_class:
+            mock_client_class.side_effect = lambda config: mock_client_factory(config.name, True)
+            
+            await manager.connect_to_servers()
+            
+            async def mock_call_tool(server_name, tool_name, parameters):
+                if parameters.get("expression") == "fail":
+                    raise RuntimeError("boom")
+                return await manager._clients_snapshot[server_name].call_tool(tool_name, parameters)
+            
+            tool_calls = [
+                {"server_name": "calc-server", "tool_name": "calculate", "parameters": {"expression": "fail"}},
+                {"server_name": "disabled-server", "tool_name": "some_tool", "parameters": {}},
+                {"server_name": "weather-server", "tool_name": "get_weather", "parameters": {"location": "Paris"}}
+            ]
+            
+            with patch.object(manager, 'call_tool', side_effect=mock_call_tool):
+                results = await manager.call_tools_parallel(tool_calls)
+            
+            assert [r.server_name for r in results] == ["calc-server", "disabled-server", "weather-server"]
+            assert [r.status for r in results] == ["error", "error", "success"]
+            assert "boom" in results[0].error
+            assert "not connected" in results[1].error
+    
+    @pytest.mark.asyncio
+    async def test_call_tools_parallel_with_unavailable_server(self, mock_config_manager, mock_client_factory):
+        """Test that calls to unavailable servers fail in place without being scheduled"""
+        manager = MCPClientManager(mock_config_manager)
+        
+        with patch('backend.services.mcp_client_manager.MCPProtocolClient') as mock_client_class:
+            mock_client_class.side_effect = lambda config: mock_client_factory(config.name, True)
+            
+            await manager.connect_to_servers()
+            
+            tool_calls = [
+                {
+                    "server_name": "disabled-server",
+                    "tool_name": "some_tool",
+                    "parameters": {}
+                },
+                {
+                    "server_name": "calc-server",
+                    "tool_name": "calculate",
+                    "parameters": {"expression": "2 + 2"}
+                }
+            ]
+            
+            with patch.object(manager, 'call_tool', wraps=manager.call_tool) as mock_call_tool:
+                results = await manager.call_tools_parallel(tool_calls)
+            
+            assert results[0].status == "error"
+            assert "not connected" in results[0].error
+            assert results[1].status == "success"
+            mock_call_tool.assert_called_once_with("calc-server", "calculate", {"expression": "2 + 2"})
+    
+    @pytest.mark.asyncio
+    async def test_call_tools_parallel_limits_calls_per_server(self, mock_config_manager, mock_client_factory):
+        """Test that a parallel batch keeps a bounded number of calls in flight per server"""
+        manager = MCPClientManager(mock_config_manager)
+        
+        with patch('backend.services.mcp_client_manager.MCPProtocolClient') as mock_client_class:
+            mock_client_class.side_effect = lambda config: mock_client_factory(config.name, True)
+            
+            await manager.connect_to_servers()
+            
+            in_flight = 0
+            peak = 0
+            
+            async def slow_call_tool(server_name, tool_name, parameters):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return MCPToolCall(
+                    server_name=server_name,
+                    tool_name=tool_name,
+                    parameters=parameters,
+                    status="success"
+                )
+            
+            tool_calls = [
+                {
+                    "server_name": "calc-server",
+                    "tool_name": "calculate",
+                    "parameters": {"expression": f"{i} + 1"}
+                }
+                for i in range(MAX_PARALLEL_CALLS_PER_SERVER * 3)
+            ]
+            
+            with patch.object(manager, 'call_tool', side_effect=slow_call_tool):
+                results = await manager.call_tools_parallel(tool_calls)
+            
+            assert len(results) == len(tool_calls)
+            assert all(result.status == "success" for result in results)
+            assert peak == MAX_PARALLEL_CALLS_PER_SERVER
+    
     @pytest.mark.asyncio
     async def test_call_tools_parallel_empty_list(self, mock_config_manager):
         """Test parallel tool execution with empty list"""
@@ -578,6 +864,17 @@ class TestMCPClientManager:
         assert error is not None
         assert "not found" in error.lower()
     
+    def test_validate_tool_parameters_without_schema(self, mock_config_manager):
+        """Test that tools with no properties or required parameters accept any parameters"""
+        manager = MCPClientManager(mock_config_manager)
+        manager.available_tools = {"misc-server": [
+            {"name": "ping"},
+            {"name": "echo", "inputSchema": {"type": "object"}}
+        ]}
+        
+        assert manager._validate_tool_parameters("misc-server", "ping", {"anything": 1}) is None
+        assert manager._validate_tool_parameters("misc-server", "echo", {"text": ["a"]}) is None
+    
     def test_validate_parameter_type(self, mock_config_manager):
         """Test parameter type validation"""
         manager = MCPClientManager(mock_config_manager)
@@ -591,6 +888,9 @@ class TestMCPClientManager:
         
         assert manager._validate_parameter_type(123, "string") is False
         assert manager._validate_parameter_type("hello", "integer") is False
+        assert manager._validate_parameter_type(True, "integer") is False
+        assert manager._validate_parameter_type(False, "number") is False
+        assert manager._validate_parameter_type(1, "boolean") is False
     
     def test_select_tools_for_query(self, mock_config_manager, sample_tools):
         """Test tool selection for query"""
@@ -604,6 +904,16 @@ class TestMCPClientManager:
         weather_tools = [t for t in tools if "weather" in t["description"].lower()]
         assert len(weather_tools) > 0
     
+    def test_select_tools_for_query_ignores_punctuation_and_repeats(self, mock_config_manager, sample_tools):
+        """Test that query keywords are stripped of punctuation and scored once"""
+        manager = MCPClientManager(mock_config_manager)
+        manager.available_tools = sample_tools
+        
+        tools = manager.select_tools_for_query("Weather? weather, WEATHER!", max_tools=1)
+        
+        assert [t["name"] for t in tools] == ["get_weather"]
+        assert tools[0]["relevance_score"] == 4
+    
     def test_select_tools_for_query_empty(self, mock_config_manager, sample_tools):
         """Test tool selection with empty query"""
         manager = MCPClientManager(mock_config_manager)
@@ -627,6 +937,12 @@ class TestMCPClientManager:
         assert status["weather-server"]["tool_count"] == 2
         assert status["disabled-server"]["connected"] is False
         assert status["disabled-server"]["enabled"] is False
+        assert status["weather-server"]["tools"] == ["get_weather", "get_forecast"]
+        assert status["disabled-server"]["tools"] == []
+        
+        # Each call hands out its own lists
+        status["weather-server"]["tools"].append("extra")
+        assert manager.get_server_status()["weather-server"]["tools"] == ["get_weather", "get_forecast"]
     
     @pytest.mark.asyncio
     async def test_refresh_server_tools(self, mock_config_manager, mock_client_factory):
@@ -642,6 +958,49 @@ class TestMCPClientManager:
             
             assert success is True
     
+    @pytest.mark.asyncio
+    async def test_refresh_server_tools_keeps_other_servers_views(self, mock_config_manager, mock_client_factory):
+        """Test that refreshing one server only rebuilds that server's tool views"""
+        manager = MCPClientManager(mock_config_manager)
+        
+        with patch('backend.services.mcp_client_manager.MCPProtocolClient') as mock_client_class:
+            mock_client_class.side_effect = lambda config: mock_client_factory(config.name, True)
+            
+            await manager.connect_to_servers()
+            calc_tools_before = [t for t in manager.get_all_tools_flat() if t["server_name"] == "calc-server"]
+            
+            new_tools = [{"name": "get_alerts", "description": "Get weather alerts"}]
+            manager.clients["weather-server"].list_tools.return_value = new_tools
+            assert await manager.refresh_server_tools("weather-server") is True
+            
+            flat_tools = manager.get_all_tools_flat()
+            calc_tools_after = [t for t in flat_tools if t["server_name"] == "calc-server"]
+            assert all(after is before for after, before in zip(calc_tools_after, calc_tools_before))
+            assert [t["name"] for t in flat_tools if t["server_name"] == "weather-server"] == ["get_alerts"]
+            assert manager.find_tools_by_name("get_weather") == []
+            assert manager._validate_tool_parameters("weather-server", "get_alerts", {}) is None
+    
+    @pytest.mark.asyncio
+    async def test_refresh_server_tools_disconnected_during_refresh(self, mock_config_manager, mock_client_factory):
+        """Test that a refresh doesn't restore tools of a server dropped while it was listing them"""
+        manager = MCPClientManager(mock_config_manager)
+        
+        with patch('backend.services.mcp_client_manager.MCPProtocolClient') as mock_client_class:
+            mock_client_class.side_effect = lambda config: mock_client_factory(config.name, True)
+            
+            await manager.connect_to_servers()
+            
+            async def list_tools_then_drop():
+                manager.clients["weather-server"].health_check.return_value = False
+                await manager._health_check_single_server("weather-server", manager.clients["weather-server"])
+                return [{"name": "get_alerts"}]
+            
+            manager.clients["weather-server"].list_tools.side_effect = list_tools_then_drop
+            
+            assert await manager.refresh_server_tools("weather-server") is False
+            assert "weather-server" not in manager.available_tools
+            assert manager.find_tools_by_name("get_alerts") == []
+    
     @pytest.mark.asyncio
     async def test_refresh_server_tools_not_connected(self, mock_config_manager):
         """Test refreshing tools for non-connected server"""
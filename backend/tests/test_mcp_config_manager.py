@@ -9,6 +9,7 @@ from pathlib import Path
 from unittest.mock import patch, mock_open
 
 from backend.models.mcp import MCPServerConfig
+from backend.services import mcp_config_manager
 from backend.services.mcp_config_manager import MCPConfigManager, MCPConfigurationError
 
 
@@ -160,6 +161,9 @@ class TestMCPConfigManager:
             manager = MCPConfigManager()
             with pytest.raises(MCPConfigurationError, match="Duplicate server name"):
                 manager.load_configuration(temp_path)
+            
+            # A rejected file leaves no half-loaded servers behind
+            assert manager.servers == {}
         finally:
             Path(temp_path).unlink(missing_ok=True)
     
@@ -183,6 +187,37 @@ class TestMCPConfigManager:
             assert len(saved_data["servers"]) == 1
             assert saved_data["servers"][0]["name"] == "test-server"
             
+            # Indented for hand editing
+            assert Path(temp_path).read_text().startswith('{\n  "servers": [')
+            
+        finally:
+            Path(temp_path).unlink(missing_ok=True)
+    
+    def test_load_saved_configuration_skips_validation(self, sample_server_config):
+        """Test that reloading a file we just saved trusts it, but an edited file is validated"""
+        manager = MCPConfigManager()
+        manager.add_server(MCPServerConfig(**sample_server_config))
+        config_class = mcp_config_manager.MCPServerConfig
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+            temp_path = f.name
+        
+        try:
+            manager.save_configuration(temp_path)
+            
+            with patch.object(config_class, 'model_construct', wraps=config_class.model_construct) as mock_construct:
+                manager.load_configuration(temp_path, force=True)
+            
+            mock_construct.assert_called_once()
+            assert manager.servers["test-server"].endpoint == "http://localhost:8001"
+            
+            # Edited outside the manager: validated again
+            with open(temp_path, 'w') as f:
+                json.dump({"servers": [{**sample_server_config, "timeout": 0}]}, f)
+            
+            with pytest.raises(MCPConfigurationError, match="Invalid server configuration"):
+                manager.load_configuration(temp_path)
+            
         finally:
             Path(temp_path).unlink(missing_ok=True)
     
@@ -294,8 +329,12 @@ class TestMCPConfigManager:
         assert "test-server" in all_servers
         assert "another-server" in all_servers
         
-        # Ensure it's a copy
-        all_servers["new-server"] = None
+        # Read-only unless a copy is requested
+        with pytest.raises(TypeError):
+            all_servers["new-server"] = None
+        
+        servers_copy = manager.get_all_servers(copy=True)
+        servers_copy["new-server"] = None
         assert "new-server" not in manager.servers
     
     def test_get_enabled_servers(self, temp_config_file):
@@ -309,6 +348,30 @@ class TestMCPConfigManager:
         assert "test-server" in enabled_servers
         assert "another-server" not in enabled_servers
     
+    def test_get_enabled_servers_follows_changes(self, temp_config_file, sample_server_config):
+        """Test that the cached enabled servers are refreshed by every kind of change"""
+        manager = MCPConfigManager()
+        manager.load_configuration(temp_config_file)
+        
+        # Callers get their own copy
+        manager.get_enabled_servers().clear()
+        assert manager.get_enabled_server_names() == ["test-server"]
+        
+        manager.enable_server("another-server")
+        assert manager.get_enabled_server_names() == ["test-server", "another-server"]
+        
+        manager.disable_server("test-server")
+        assert manager.get_enabled_server_names() == ["another-server"]
+        
+        manager.add_server(MCPServerConfig(**{**sample_server_config, "name": "new-server"}))
+        assert manager.get_enabled_server_count() == 2
+        
+        manager.remove_server("another-server")
+        assert list(manager.get_enabled_servers()) == ["new-server"]
+        
+        manager.servers = {}
+        assert manager.get_enabled_server_count() == 0
+    
     def test_enable_server(self, temp_config_file):
         """Test enabling a server"""
         manager = MCPConfigManager()
@@ -320,6 +383,19 @@ class TestMCPConfigManager:
         
         assert manager.servers["another-server"].enabled
     
+    def test_enable_disable_server_unchanged(self, temp_config_file):
+        """Test that setting a server's current state keeps the loaded configuration"""
+        manager = MCPConfigManager(temp_config_file)
+        manager.load_configuration()
+        servers = manager.servers
+        
+        manager.enable_server("test-server")
+        manager.disable_server("another-server")
+        manager.reload_configuration()
+        
+        assert manager.servers is servers
+        assert manager.get_enabled_server_names() == ["test-server"]
+    
     def test_enable_server_not_found(self):
         """Test enabling non-existent server"""
         manager = MCPConfigManager()
@@ -378,6 +454,33 @@ class TestMCPConfigManager:
         
         assert len(manager.servers) == 2
     
+    def test_reload_configuration_skips_unchanged_file(self, temp_config_file):
+        """Test that reloading an unchanged file keeps the loaded servers without reparsing"""
+        manager = MCPConfigManager(temp_config_file)
+        manager.load_configuration()
+        servers = manager.servers
+        
+        with patch.object(mcp_config_manager.orjson, 'loads') as mock_loads:
+            manager.reload_configuration()
+        
+        mock_loads.assert_not_called()
+        assert manager.servers is servers
+        
+        # Forced, or after in-memory edits, the file is read again
+        manager.reload_configuration(force=True)
+        assert manager.servers is not servers
+        
+        manager.disable_server("test-server")
+        manager.reload_configuration()
+        assert manager.servers["test-server"].enabled is True
+        
+        # Edited on disk: the new contents are loaded
+        with open(temp_config_file, 'w') as f:
+            json.dump({"servers": []}, f)
+        
+        manager.reload_configuration()
+        assert manager.servers == {}
+    
     def test_get_server_count(self, temp_config_file):
         """Test getting server count"""
         manager = MCPConfigManager()
@@ -452,6 +555,24 @@ class TestMCPConfigManager:
         assert "test-server" in manager.servers
         assert "another-server" in manager.servers
     
+    def test_import_exported_configuration_trusted(self, sample_config_data):
+        """Test round-tripping an export through a trusted import"""
+        source = MCPConfigManager()
+        source.import_configuration(sample_config_data)
+        
+        manager = MCPConfigManager()
+        manager.import_configuration(source.export_configuration(), trusted=True)
+        
+        assert manager.servers == source.servers
+    
+    def test_import_configuration_reports_invalid_index(self, sample_server_config):
+        """Test that the first invalid server entry is reported by its index"""
+        manager = MCPConfigManager()
+        config_data = {"servers": [sample_server_config, {**sample_server_config, "name": "bad", "timeout": -1}]}
+        
+        with pytest.raises(MCPConfigurationError, match="Invalid server configuration at index 1"):
+            manager.import_configuration(config_data)
+    
     def test_import_configuration_invalid(self):
         """Test importing invalid configuration"""
         manager = MCPConfigManager()
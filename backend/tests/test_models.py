@@ -172,6 +172,24 @@ class TestConversation:
         # Get all messages when limit is higher
         context_all = conversation.get_context_messages(limit=20)
         assert len(context_all) == 15
+    
+    def test_conversation_recent_messages(self):
+        """Test the bounded window of recent messages"""
+        conversation = Conversation(id="conv-1", messages=[
+            Message(conversation_id="conv-1", content=f"Message {i}", sender="user") for i in range(12)
+        ])
+        
+        assert [msg.content for msg in conversation.recent_messages][0] == "Message 2"
+        
+        conversation.add_message(Message(conversation_id="conv-1", content="Added", sender="assistant"))
+        recent = list(conversation.recent_messages)
+        assert len(recent) == 10
+        assert recent[0].content == "Message 3"
+        assert recent[-1].content == "Added"
+        
+        # Messages appended directly to the list are picked up as well
+        conversation.messages.append(Message(conversation_id="conv-1", content="Direct", sender="user"))
+        assert conversation.recent_messages[-1].content == "Direct"
 
 
 class TestMCPServerConfig:
@@ -0,0 +1,34 @@
+"""
+Unit tests for the simplified Grafana MCP client
+"""
+
+import dataclasses
+import pytest
+
+from backend.services.simple_mcp_client import MCPToolResult
+
+
+class TestMCPToolResult:
+    """Test cases for MCPToolResult"""
+    
+    def test_result_is_immutable_record(self):
+        """Test that results are frozen records, not tuples"""
+        result = MCPToolResult(tool_name="search_dashboards", success=True, result={"dashboards": []})
+        
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            result.success = False
+        
+        assert result == MCPToolResult("search_dashboards", True, {"dashboards": []})
+        assert result != ("search_dashboards", True, {"dashboards": []}, None)
+        assert not isinstance(result, tuple)
+    
+    def test_result_serializes_as_object(self):
+        """Test that results serialize field by field"""
+        result = MCPToolResult(tool_name="list_datasources", success=False, error="timeout")
+        
+        assert dataclasses.asdict(result) == {
+            "tool_name": "list_datasources",
+            "success": False,
+            "result": None,
+            "error": "timeout"
+        }